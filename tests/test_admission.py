@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from voiceflow_ai.core.admission import AdmissionController, AdmissionRejected
+
+
+async def until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
+
+
+def test_rejects_when_the_queue_is_full():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue_depth=1, max_wait_seconds=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with admission.slot():
+                await release.wait()
+
+        async def wait_for_slot():
+            async with admission.slot():
+                pass
+
+        holder = asyncio.create_task(hold())
+        await until(lambda: admission.in_flight == 1)
+        waiter = asyncio.create_task(wait_for_slot())
+        await until(lambda: admission.waiting == 1)
+
+        with pytest.raises(AdmissionRejected, match="queue is full") as rejected:
+            async with admission.slot():
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return admission, rejected.value
+
+    admission, rejected = asyncio.run(scenario())
+    assert rejected.retry_after == 5
+    assert admission.stats() == {
+        "max_concurrency": 1,
+        "max_queue_depth": 1,
+        "max_wait_seconds": 5,
+        "waiting": 0,
+        "in_flight": 0,
+        "rejected": 1,
+    }
+
+
+def test_rejects_after_max_wait_seconds():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue_depth=4, max_wait_seconds=0.05)
+        async with admission.slot():
+            with pytest.raises(AdmissionRejected, match="No inference slot") as rejected:
+                async with admission.slot():
+                    pass
+        # The slot is free again once the holder leaves
+        async with admission.slot():
+            pass
+        return admission, rejected.value
+
+    admission, rejected = asyncio.run(scenario())
+    # Retry-After is whole seconds, at least one
+    assert rejected.retry_after == 1
+    assert admission.stats()["rejected"] == 1
+    assert admission.stats()["waiting"] == 0
+
+
+def test_slot_is_released_when_the_request_fails():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue_depth=1, max_wait_seconds=0.05)
+        with pytest.raises(RuntimeError):
+            async with admission.slot():
+                raise RuntimeError("inference failed")
+        async with admission.slot():
+            return admission.stats()["in_flight"]
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,129 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from voiceflow_ai.core.audio import (
+    MULAW_TABLE, SAMPLE_RATE, decode_audio_bytes, decode_raw, detect_speech, resample, trim_silence,
+)
+
+
+def tone(frequency, seconds, amplitude=0.5, sample_rate=SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def silence(seconds, sample_rate=SAMPLE_RATE):
+    return np.zeros(int(seconds * sample_rate), dtype=np.float32)
+
+
+def rms(audio):
+    return float(np.sqrt(np.mean(np.square(audio, dtype=np.float64))))
+
+
+def test_detect_speech_passes_a_voice_band_tone():
+    has_speech, voiced_seconds = detect_speech(tone(440, 1.0))
+    assert has_speech
+    assert voiced_seconds == pytest.approx(0.99, abs=0.03)
+
+
+@pytest.mark.parametrize("audio", [
+    silence(1.0),
+    np.zeros(0, dtype=np.float32),
+    # Mains hum has too few zero crossings, white noise too many
+    tone(50, 1.0),
+    np.random.default_rng(0).uniform(-0.5, 0.5, SAMPLE_RATE).astype(np.float32),
+], ids=["silence", "empty", "hum", "white-noise"])
+def test_detect_speech_rejects_non_speech(audio):
+    has_speech, _ = detect_speech(audio)
+    assert not has_speech
+
+
+def test_detect_speech_needs_min_speech_ms():
+    audio = np.concatenate([silence(1.0), tone(440, 0.09), silence(1.0)])
+    assert not detect_speech(audio, min_speech_ms=150)[0]
+    assert detect_speech(audio, min_speech_ms=60)[0]
+
+
+def test_trim_silence_keeps_padding_around_speech():
+    audio = np.concatenate([silence(1.2), tone(440, 0.6), silence(0.9)])
+    trimmed = trim_silence(audio, padding_ms=200)
+    # 30 ms frames, so the cut lands within a frame of the 200 ms padding
+    assert len(trimmed) / SAMPLE_RATE == pytest.approx(1.0, abs=0.07)
+    assert rms(trimmed) > rms(audio)
+
+
+def test_trim_silence_leaves_silent_audio_unchanged():
+    audio = silence(1.0)
+    assert trim_silence(audio) is audio
+
+
+@pytest.mark.parametrize("orig_sr", [8000, 22050, 44100, 48000])
+def test_resample_length(orig_sr):
+    assert len(resample(tone(440, 1.0, sample_rate=orig_sr), orig_sr)) == SAMPLE_RATE
+
+
+def test_resample_keeps_speech_band_and_removes_aliases():
+    kept = resample(tone(1000, 1.0, sample_rate=48000), 48000)
+    assert rms(kept[1000:-1000]) == pytest.approx(rms(tone(1000, 1.0)), rel=0.02)
+    # 12 kHz is above the 8 kHz Nyquist frequency and would fold to 4 kHz without filtering
+    aliased = resample(tone(12000, 1.0, sample_rate=48000), 48000)
+    assert rms(aliased[1000:-1000]) < 1e-3
+
+
+def band_rms(audio, sample_rate, low, high):
+    """RMS of the part of the spectrum between ``low`` and ``high`` Hz."""
+    spectrum = np.fft.rfft(audio * np.hanning(len(audio)))
+    frequencies = np.fft.rfftfreq(len(audio), 1 / sample_rate)
+    spectrum[(frequencies < low) | (frequencies > high)] = 0
+    return rms(np.fft.irfft(spectrum, len(audio)))
+
+
+def test_upsampling_removes_images_above_the_source_nyquist():
+    upsampled = resample(tone(3000, 1.0, sample_rate=8000), 8000)[1000:-1000]
+    # Interpolating a 3 kHz tone sampled at 8 kHz leaves an image at 5 kHz
+    image = band_rms(upsampled, SAMPLE_RATE, 4500, 5500)
+    kept = band_rms(upsampled, SAMPLE_RATE, 2500, 3500)
+    assert 20 * np.log10(image / kept) < -40
+    # Flat up to the rolloff, unlike linear interpolation
+    assert rms(upsampled) == pytest.approx(rms(tone(3000, 1.0)), rel=0.02)
+
+
+def test_decode_audio_bytes_reads_stereo_pcm_wav():
+    left, right = tone(440, 0.5, sample_rate=8000), tone(440, 0.5, amplitude=0.25, sample_rate=8000)
+    frames = (np.stack([left, right], axis=1) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(frames.tobytes())
+
+    audio = decode_audio_bytes(buffer.getvalue())
+    assert audio.dtype == np.float32
+    assert len(audio) == SAMPLE_RATE // 2
+    assert np.max(np.abs(audio)) == pytest.approx(0.375, abs=0.01)
+
+
+def test_mulaw_table_matches_audioop():
+    audioop = pytest.importorskip("audioop")
+    expected = np.frombuffer(audioop.ulaw2lin(bytes(range(256)), 2), dtype="<i2") / 32768.0
+    np.testing.assert_array_equal(MULAW_TABLE, expected.astype(np.float32))
+
+
+def test_decode_raw_pcm16_drops_a_trailing_partial_sample():
+    samples = (tone(440, 1.0, sample_rate=8000) * 32767).astype("<i2")
+    audio = decode_raw(samples.tobytes() + b"\x01", "pcm_s16le", 8000)
+    assert len(audio) == SAMPLE_RATE
+
+
+def test_decode_raw_mulaw_upsamples_to_16k():
+    audio = decode_raw(bytes(range(256)) * 31 + b"\xff" * 64, "mulaw", 8000)
+    assert len(audio) == 2 * 8000
+    assert audio.dtype == np.float32
+
+
+def test_decode_raw_rejects_unknown_encodings():
+    with pytest.raises(ValueError, match="Unsupported raw encoding"):
+        decode_raw(b"\x00\x00", "alaw", 8000)
@@ -0,0 +1,66 @@
+from voiceflow_ai.core import cache
+from voiceflow_ai.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_default_on_miss():
+    entries = TTLCache(max_entries=2, ttl_seconds=60)
+    assert entries.get("missing") is None
+    assert entries.get("missing", "default") == "default"
+    assert entries.stats()["misses"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    entries = TTLCache(max_entries=2, ttl_seconds=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    # Reading "a" makes "b" the least recently used
+    assert entries.get("a") == 1
+    entries.set("c", 3)
+
+    assert entries.get("b") is None
+    assert entries.get("a") == 1
+    assert entries.get("c") == 3
+    assert entries.stats()["evictions"] == 1
+    assert len(entries) == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    entries = TTLCache(max_entries=10, ttl_seconds=5)
+    entries.set("a", 1)
+
+    clock.now += 4.9
+    assert entries.get("a") == 1
+    clock.now += 0.2
+    assert entries.get("a") is None
+
+    stats = entries.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+    assert stats["hit_rate"] == 0.5
+
+
+def test_setting_an_entry_again_refreshes_its_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    entries = TTLCache(max_entries=10, ttl_seconds=5)
+    entries.set("a", 1)
+    clock.now += 4
+    entries.set("a", 2)
+    clock.now += 4
+    assert entries.get("a") == 2
+
+
+def test_zero_entries_caches_nothing():
+    entries = TTLCache(max_entries=0, ttl_seconds=60)
+    entries.set("a", 1)
+    assert entries.get("a") is None
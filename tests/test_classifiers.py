@@ -0,0 +1,37 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from voiceflow_ai.core.classifiers import ClassifierRegistry  # noqa: E402
+from voiceflow_ai.core.config import settings as c  # noqa: E402
+
+MODELS = {"a": "path/a", "b": "path/b", "c": "path/c"}
+
+
+def registry(monkeypatch, memory_budget_mb):
+    registry = ClassifierRegistry(models=MODELS, table={}, memory_budget_mb=memory_budget_mb)
+    # 1024 x 256 float32 weights, 1 MB per model
+    monkeypatch.setattr(registry, "_load", lambda name: (torch.nn.Linear(1024, 256, bias=False), None))
+    return registry
+
+
+def test_models_stay_loaded_without_a_budget(monkeypatch):
+    monkeypatch.setattr(c, "CLASSIFIER_MEMORY_BUDGET_MB", None)
+    models = registry(monkeypatch, None)
+    for name in MODELS:
+        models.get(name)
+    assert list(models.loaded) == ["a", "b", "c"]
+    assert models.evictions == 0
+    assert models.memory_used() == 3 * 2 ** 20
+    assert models.stats()["memory_budget_mb"] is None
+
+
+def test_least_recently_used_model_is_evicted_over_budget(monkeypatch):
+    models = registry(monkeypatch, 2)
+    models.get("a")
+    models.get("b")
+    models.get("a")
+    models.get("c")
+    assert list(models.loaded) == ["a", "c"]
+    assert models.evictions == 1
@@ -0,0 +1,61 @@
+import pytest
+
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.decoding import clip_window, generate_options, lookup_turn, needs_fallback, select_profile
+
+TABLE = {
+    ("medicare", 4): "exact",
+    ("medicare", "*"): "any turn",
+    ("*", 1): "any call type",
+}
+
+
+@pytest.mark.parametrize("call_type, turn_number, expected", [
+    ("medicare", 4, "exact"),
+    ("medicare", 1, "any turn"),
+    ("aca", 1, "any call type"),
+    ("aca", 2, None),
+])
+def test_lookup_turn_precedence(call_type, turn_number, expected):
+    assert lookup_turn(TABLE, call_type, turn_number) == expected
+
+
+def test_whisper_model_table_routes_turns():
+    assert lookup_turn(c.WHISPER_MODEL_TABLE, "medicare", 1) == "base.en"
+    assert lookup_turn(c.WHISPER_MODEL_TABLE, "medicare", 4) == "small.en"
+    # Unlisted turns fall back to WHISPER_MODEL_SIZE in TranscriptionService.select_model
+    assert lookup_turn(c.WHISPER_MODEL_TABLE, "fe", 3) is None
+
+
+def test_select_profile(monkeypatch):
+    assert select_profile("medicare", 1, 4.0)[0] == "fast"
+    assert select_profile("medicare", 3, 4.0)[0] == c.DEFAULT_DECODING_PROFILE
+    assert select_profile("medicare", 3, c.SHORT_CLIP_SECONDS)[0] == c.SHORT_CLIP_PROFILE
+    assert select_profile("medicare", 3)[0] == c.DEFAULT_DECODING_PROFILE
+
+    monkeypatch.setattr(c, "ADAPTIVE_DECODING", False)
+    assert select_profile("medicare", 3, 0.5)[0] == c.DEFAULT_DECODING_PROFILE
+
+
+def test_clip_window():
+    assert clip_window("aca", 1) == 6.0
+    assert clip_window("medicare", 4) == 8.0
+    assert clip_window("aca", 4) is None
+
+
+def test_generate_options_samples_above_temperature_zero():
+    profile = c.DECODING_PROFILES["accurate"]
+    assert generate_options(profile) == {"beam_size": 5}
+    assert generate_options(profile, 0.4) == {
+        "beam_size": 1, "num_hypotheses": 5, "sampling_topk": 0, "sampling_temperature": 0.4,
+    }
+
+
+def test_needs_fallback():
+    assert not needs_fallback("yes I am", [1, 2, 3], -0.2)
+    # Low average log probability
+    assert needs_fallback("yes I am", [1, 2, 3], -2.0)
+    # Repetition loop, too compressible
+    assert needs_fallback("thank you " * 40, list(range(80)), -0.1)
+    # Silence is not retried at higher temperatures
+    assert not needs_fallback("yes I am", [1, 2, 3], -2.0, no_speech_prob=0.9)
@@ -0,0 +1,65 @@
+import pytest
+
+from voiceflow_ai.core.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_rendering():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["route"])
+    requests.inc(route="/transcribe/")
+    requests.inc(2, route="/transcribe/")
+    registry.gauge("ready", "Model loaded").set(1)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/transcribe/"} 3\n'
+        "# HELP ready Model loaded\n"
+        "# TYPE ready gauge\n"
+        "ready 1\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 2.0):
+        latency.observe(value, stage="decode")
+
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{stage="decode",le="0.1"} 1',
+        'latency_seconds_bucket{stage="decode",le="1.0"} 3',
+        'latency_seconds_bucket{stage="decode",le="+Inf"} 4',
+        'latency_seconds_sum{stage="decode"} 3.05',
+        'latency_seconds_count{stage="decode"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors", ["reason"]).inc(reason='bad "quote"\\\n')
+    assert 'errors_total{reason="bad \\"quote\\"\\\\\\n"} 1' in registry.render()
+
+
+def test_callback_metric_reads_labelled_values_at_scrape_time():
+    registry = MetricsRegistry()
+    depths = {("small.en", "fast"): 2}
+    registry.callback("queue_depth", "Queued requests", "gauge", lambda: dict(depths), ["model", "profile"])
+    depths[("base.en", "greedy")] = 0
+
+    rendered = registry.render()
+    assert 'queue_depth{model="small.en",profile="fast"} 2' in rendered
+    assert 'queue_depth{model="base.en",profile="greedy"} 0' in rendered
+
+
+def test_registering_a_name_again_returns_the_same_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("hits_total", "Hits") is registry.counter("hits_total", "Hits")
+
+
+def test_wrong_labels_are_rejected():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ["route"])
+    with pytest.raises(ValueError):
+        counter.inc(model="small.en")
@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from voiceflow_ai.core import onnx_backend  # noqa: E402
+from voiceflow_ai.core.config import settings as c  # noqa: E402
+
+
+def test_to_onnx_falls_back_to_pytorch_when_export_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(c, "ONNX_CACHE_DIR", str(tmp_path))
+
+    def fail(model, tokenizer, path):
+        raise RuntimeError("unsupported operator")
+
+    monkeypatch.setattr(onnx_backend, "export", fail)
+    model = object()
+    assert onnx_backend.to_onnx("medicare", "path/medicare", model, tokenizer=None) is model
+
+
+def test_to_onnx_falls_back_to_pytorch_without_onnxruntime(monkeypatch, tmp_path):
+    monkeypatch.setattr(c, "ONNX_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(onnx_backend, "export", lambda model, tokenizer, path: open(path, "wb").close())
+
+    def missing(path):
+        raise ImportError("No module named 'onnxruntime'")
+
+    monkeypatch.setattr(onnx_backend, "load_session", missing)
+    model = object()
+    assert onnx_backend.to_onnx("medicare", "path/medicare", model, tokenizer=None) is model
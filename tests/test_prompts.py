@@ -0,0 +1,37 @@
+import pytest
+
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.prompts import ANY, PromptRegistry
+
+
+@pytest.fixture
+def prompts():
+    return PromptRegistry(
+        prompts={"greeting": "hello", "age": "sixty", "general": "medicare"},
+        table={
+            (1, "medicare", ANY): "greeting",
+            (4, "medicare", "B"): "age",
+            (ANY, "medicare", ANY): "general",
+        },
+    )
+
+
+@pytest.mark.parametrize("call_type, model_type, turn_number, expected", [
+    ("medicare", "A", 1, "greeting"),
+    ("medicare", "B", 4, "age"),
+    ("medicare", "A", 4, "general"),
+    ("aca", "A", 1, None),
+])
+def test_lookup(prompts, call_type, model_type, turn_number, expected):
+    prompt = prompts.lookup(call_type, model_type, turn_number)
+    assert (prompt.name if prompt is not None else None) == expected
+
+
+def test_lookup_uses_glossary_for_three_class_models(monkeypatch):
+    monkeypatch.setattr(c, "TYPE", False)
+    assert PromptRegistry().lookup("medicare", "A", 1).name == "glossary"
+
+
+def test_every_table_entry_names_a_prompt():
+    registry = PromptRegistry()
+    assert set(registry.table.values()) <= set(registry.prompts)
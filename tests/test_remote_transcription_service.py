@@ -0,0 +1,16 @@
+import subprocess
+import sys
+
+
+def test_remote_front_end_does_not_import_inference_libraries():
+    # A fresh interpreter, since other tests may already have imported them
+    code = (
+        "import os, sys\n"
+        "os.environ['VOICEFLOW_TRANSCRIPTION_MODE'] = 'remote'\n"
+        "from voiceflow_ai.core.dependencies import get_transcription_service\n"
+        "service = get_transcription_service()\n"
+        "assert type(service).__name__ == 'RemoteTranscriptionService'\n"
+        "print(sorted({'torch', 'ctranslate2', 'faster_whisper'} & set(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
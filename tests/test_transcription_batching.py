@@ -0,0 +1,88 @@
+import collections
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faster_whisper")
+
+from voiceflow_ai.services.transcription_service import TranscriptionService  # noqa: E402
+
+SOT_PREV, SOT, NO_TIMESTAMPS = 1, 2, 3
+
+GenerationResult = collections.namedtuple("GenerationResult", ["sequences_ids", "scores", "no_speech_prob"])
+
+
+class FakeTokenizer:
+    sot_prev = SOT_PREV
+    sot_sequence = [SOT]
+    no_timestamps = NO_TIMESTAMPS
+
+    @staticmethod
+    def decode(tokens):
+        return " ".join(str(token) for token in tokens)
+
+
+class FakeWhisper:
+    """Checks what CTranslate2 checks: <|startoftranscript|> at the same index in every prompt."""
+
+    def __init__(self, score=-0.1, no_speech_prob=0.0):
+        self.model = self
+        self.calls = []
+        self.kwargs = []
+        self.score = score
+        self.no_speech_prob = no_speech_prob
+
+    def generate(self, features, prompts, **kwargs):
+        assert len({prompt.index(SOT) for prompt in prompts}) == 1
+        self.calls.append(prompts)
+        self.kwargs.append(kwargs)
+        # Echo the prompt length so results can be matched back to their request
+        return [GenerationResult([[100 + len(prompt)]], [self.score], self.no_speech_prob) for prompt in prompts]
+
+
+@pytest.fixture
+def service():
+    service = TranscriptionService()
+    service.tokenizer = FakeTokenizer()
+    service.whisper_models = {"tiny": FakeWhisper()}
+    service._encode = lambda model_name, audios: [np.zeros((2, 4), dtype=np.float32) for _ in audios]
+    yield service
+    service.executor.shutdown(wait=False)
+
+
+PROFILE = {"beam_size": 1, "best_of": 1, "temperature": [0.0], "without_timestamps": True}
+
+
+def test_batch_with_different_prompts_decodes_each_prompt_separately(service):
+    profile = PROFILE
+    audio = np.zeros(16000, dtype=np.float32)
+    items = [(audio, None), (audio, [10, 11, 12]), (audio, None), (audio, [20])]
+
+    outputs = service._transcribe_batch(items, model_name="tiny", profile_name="greedy", profile=profile)
+
+    # Prompts: [SOT, NO_TS], [SOT_PREV, 10, 11, 12, SOT, NO_TS], [SOT_PREV, 20, SOT, NO_TS]
+    assert outputs == [("102", 4), ("106", 4), ("102", 4), ("104", 4)]
+    assert sorted(len(prompts) for prompts in service.whisper_models["tiny"].calls) == [1, 1, 2]
+
+
+def test_batch_suppresses_the_same_tokens_as_transcribe(service):
+    service.suppress_tokens = [0, 11, 13, 30, 50257, 50358]
+    audio = np.zeros(16000, dtype=np.float32)
+    service._transcribe_batch([(audio, None)], model_name="tiny", profile_name="greedy", profile=PROFILE)
+
+    [kwargs] = service.whisper_models["tiny"].kwargs
+    assert kwargs["suppress_tokens"] == [0, 11, 13, 30, 50257, 50358]
+    assert kwargs["return_no_speech_prob"]
+
+
+@pytest.mark.parametrize("score, no_speech_prob, expected", [
+    (-0.1, 0.9, "102"),
+    (-3.0, 0.3, "102"),
+    # Likely silence and unlikely text, dropped like transcribe drops the segment
+    (-3.0, 0.9, ""),
+])
+def test_batch_drops_results_transcribe_would_skip_as_silence(service, score, no_speech_prob, expected):
+    service.whisper_models["tiny"] = FakeWhisper(score, no_speech_prob)
+    audio = np.zeros(16000, dtype=np.float32)
+    outputs = service._transcribe_batch([(audio, None)], model_name="tiny", profile_name="greedy", profile=PROFILE)
+    assert outputs == [(expected, 1)]
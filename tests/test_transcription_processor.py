@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from voiceflow_ai.core.transcription_processor import TranscriptionProcessor  # noqa: E402
+
+
+@pytest.fixture
+def processor():
+    return TranscriptionProcessor()
+
+
+def test_label_transcription_marks_gated_audio_silent(processor):
+    info = {"speech_gate": {"speech": False, "voiced_seconds": 0.0}}
+    assert processor.label_transcription("", info, "c1", "A", "medicare", 1) == ("silent", 1.2, "", "VAD")
+
+
+def test_label_transcription_labels_speech_with_the_rules(processor):
+    info = {"speech_gate": {"speech": True, "voiced_seconds": 1.0}}
+    label, confidence, text, model_used = processor.label_transcription(
+        "Sorry, I didn't hear it ring.", info, "c1", "A", "medicare", 2
+    )
+    assert (label, confidence, text, model_used) == ("HP", 1.0, "sorry i didn't hear it ring", "SS")
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("faster_whisper")
+
+from voiceflow_ai.core.config import settings as c  # noqa: E402
+from voiceflow_ai.services.transcription_service import TranscriptionService  # noqa: E402
+
+
+@pytest.fixture
+def service():
+    service = TranscriptionService()
+    service.model_table = {("*", 1): "base.en", ("medicare", 4): "small.en"}
+    yield service
+    service.executor.shutdown(wait=False)
+
+
+def test_warmup_routes_only_reachable_combinations(service, monkeypatch):
+    monkeypatch.setattr(c, "DECODING_PROFILE_TABLE", {("*", 1): "fast"})
+    routes = service.warmup_routes()
+
+    # base.en only serves the first turn, so it only sees greeting prompts
+    assert routes[("base.en", "fast")] == {"greeting", "greeting_medicare"}
+    assert routes[("base.en", "greedy")] == {"greeting", "greeting_medicare"}
+    assert ("base.en", "accurate") not in routes
+    # Later turns keep the default model and profile, and never the greetings
+    assert {"age_medicare", "general_medicare", "income_aca"} <= routes[("small.en", "accurate")]
+    assert not {"greeting", "greeting_medicare"} & routes[("small.en", "accurate")]
+    assert ("small.en", "fast") not in routes
+
+
+def test_warmup_routes_without_adaptive_decoding(service, monkeypatch):
+    monkeypatch.setattr(c, "ADAPTIVE_DECODING", False)
+    assert {profile for _, profile in service.warmup_routes()} == {"fast", "accurate"}
@@ -0,0 +1,203 @@
+"""Whisper model size / compute type benchmark on our own clips.
+
+Every combination of model size, compute type, cpu_threads and num_workers runs in a fresh
+subprocess, so load time and peak RSS are measured per configuration. Each configuration
+transcribes every WAV in a folder through TranscriptionService and reports real-time factor,
+p50/p95 latency, peak RSS and word agreement with ``<wav>.txt`` reference transcripts.
+
+    python -m voiceflow_ai.benchmark /data/reference_wavs --model-sizes base.en,small.en \\
+        --compute-types int8,int8_float32,float32 --cpu-threads 4,8
+"""
+import argparse
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.logger import get_logger
+
+logger = get_logger("benchmark")
+
+
+def word_agreement(hypothesis, reference):
+    """1 - word error rate, floored at 0, over whitespace-separated words."""
+    hypothesis, reference = hypothesis.split(), reference.split()
+    if not reference:
+        return float(not hypothesis)
+    # Levenshtein distance over words, one row at a time
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return max(0.0, 1.0 - previous[-1] / len(reference))
+
+
+def run_config(config, wav_dir, call_type, model_type, turn_number, concurrency, repeat):
+    """Benchmark one configuration in this process and return its summary."""
+    from voiceflow_ai.core.audio import duration_seconds, load_audio
+    from voiceflow_ai.core.transcription_processor import TranscriptionProcessor
+    from voiceflow_ai.services.transcription_service import TranscriptionService
+
+    # Measure the model itself, one decode per clip without batching or cached results
+    c.WHISPER_BATCHING = False
+    c.WARMUP = False
+    c.RESULT_CACHE = False
+    service = TranscriptionService()
+    load_start = time.perf_counter()
+    if not service.initialize_model(
+        config["model_size"],
+        config["compute_type"],
+        cpu_threads=config["cpu_threads"],
+        num_workers=config["num_workers"],
+    ):
+        raise RuntimeError(f"Failed to load Whisper for {config}")
+    load_seconds = time.perf_counter() - load_start
+
+    processor = TranscriptionProcessor()
+    clips = []
+    for path in sorted(Path(wav_dir).glob("*.wav")):
+        reference = path.with_suffix(".wav.txt")
+        clips.append({
+            "name": path.name,
+            "audio": load_audio(str(path)),
+            "reference": processor.normalize_text(reference.read_text()).split() if reference.exists() else None,
+        })
+
+    def transcribe(clip):
+        start = time.perf_counter()
+        text, _ = service.transcribe_audio(clip["audio"], call_type, model_type, turn_number)
+        return time.perf_counter() - start, text
+
+    latencies = []
+    agreements = []
+    audio_seconds = 0.0
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(repeat):
+            for clip, (latency, text) in zip(clips, pool.map(transcribe, clips)):
+                latencies.append(latency)
+                audio_seconds += duration_seconds(clip["audio"])
+                if clip["reference"] is not None:
+                    agreements.append(word_agreement(
+                        " ".join(processor.normalize_text(text or "").split()), " ".join(clip["reference"])
+                    ))
+    wall_seconds = time.perf_counter() - wall_start
+
+    return {
+        **config,
+        "clips": len(clips),
+        "load_seconds": load_seconds,
+        "rtf": wall_seconds / audio_seconds if audio_seconds else None,
+        "p50_seconds": float(np.percentile(latencies, 50)) if latencies else None,
+        "p95_seconds": float(np.percentile(latencies, 95)) if latencies else None,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "word_agreement": float(np.mean(agreements)) if agreements else None,
+    }
+
+
+def run_matrix(args):
+    configs = [
+        {"model_size": model_size, "compute_type": compute_type, "cpu_threads": cpu_threads,
+         "num_workers": num_workers}
+        for model_size, compute_type, cpu_threads, num_workers in itertools.product(
+            args.model_sizes, args.compute_types, args.cpu_threads, args.num_workers
+        )
+    ]
+    results = []
+    for index, config in enumerate(configs, 1):
+        logger.info(f"Benchmarking {index}/{len(configs)}: {config}")
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as result_file:
+            result_path = result_file.name
+        try:
+            # A fresh interpreter per configuration keeps peak RSS and load time honest
+            completed = subprocess.run(
+                [sys.executable, "-m", "voiceflow_ai.benchmark", args.wav_dir,
+                 "--run-config", json.dumps(config), "--result-file", result_path,
+                 "--call-type", args.call_type, "--model-type", args.model_type,
+                 "--turn-number", str(args.turn_number), "--concurrency", str(args.concurrency),
+                 "--repeat", str(args.repeat)],
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                logger.error(f"Configuration {config} failed: {completed.stderr[-2000:]}")
+                results.append({**config, "error": completed.stderr.strip().splitlines()[-1:]})
+                continue
+            with open(result_path) as f:
+                results.append(json.load(f))
+        finally:
+            os.unlink(result_path)
+    return results
+
+
+def format_table(results):
+    columns = ["model_size", "compute_type", "cpu_threads", "num_workers", "rtf", "p50_seconds",
+               "p95_seconds", "peak_rss_mb", "word_agreement", "load_seconds"]
+    rows = [columns]
+    for result in results:
+        rows.append([
+            f"{result[column]:.3f}" if isinstance(result.get(column), float) else str(result.get(column, "error"))
+            for column in columns
+        ])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+def _csv(cast=str):
+    return lambda value: [cast(item) for item in value.split(",") if item]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Whisper configurations on reference WAVs.")
+    parser.add_argument("wav_dir", help="Folder of .wav clips, with optional <clip>.wav.txt references")
+    parser.add_argument("--model-sizes", type=_csv(), default=["base.en", "small.en"])
+    parser.add_argument("--compute-types", type=_csv(), default=["int8", "int8_float32", "float32"])
+    parser.add_argument("--cpu-threads", type=_csv(int), default=[0])
+    parser.add_argument("--num-workers", type=_csv(int), default=[1])
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Clips decoded at once, only num_workers > 1 runs them in parallel")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--call-type", default="medicare")
+    parser.add_argument("--model-type", default="A")
+    parser.add_argument("--turn-number", type=int, default=2)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--run-config", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run_config:
+        result = run_config(json.loads(args.run_config), args.wav_dir, args.call_type, args.model_type,
+                            args.turn_number, args.concurrency, args.repeat)
+        with open(args.result_file, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    results = run_matrix(args)
+    print(format_table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+"""Offline bulk transcription of archived recordings.
+
+Walks a directory of audio files, shards them across a pool of worker processes, each with its
+own Whisper model, and runs the same transcription and labeling pipeline as the API. Results
+are appended to a JSONL file that doubles as the checkpoint: rerunning the same command skips
+files already written.
+
+    python -m voiceflow_ai.bulk_transcribe /data/calls results.jsonl --call-type medicare --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.logger import get_logger
+
+logger = get_logger("bulk_transcribe")
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".m4a")
+
+# Per-process state, set up once by _init_worker
+_service = None
+_processor = None
+
+
+def find_audio_files(input_dir, extensions=AUDIO_EXTENSIONS):
+    return sorted(
+        str(path) for path in Path(input_dir).rglob("*")
+        if path.is_file() and path.suffix.lower() in extensions
+    )
+
+
+def load_manifest(path):
+    """Per-file overrides: a JSONL file of {"path", "call_type", "model_type", "turn_number"}."""
+    manifest = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                manifest[os.path.abspath(entry["path"])] = entry
+    return manifest
+
+
+def load_checkpoint(output_path, retry_errors=False):
+    """Paths already written to the output file, optionally leaving failed ones to be redone."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run, the file gets redone
+                continue
+            if not (retry_errors and record.get("error")):
+                done.add(record["path"])
+    return done
+
+
+def _init_worker(model_size, compute_type, cpu_threads, classification_url, load_failed):
+    global _service, _processor
+    # One request at a time per process, so there is nothing to batch and warmup does not pay off
+    c.WHISPER_BATCHING = False
+    c.WARMUP = False
+    c.RESULT_CACHE = False
+    if classification_url:
+        c.CLASSIFICATION_URL = classification_url
+    try:
+        from voiceflow_ai.core.transcription_processor import TranscriptionProcessor
+        from voiceflow_ai.services.transcription_service import TranscriptionService
+
+        service = TranscriptionService()
+        loaded = service.initialize_model(model_size, compute_type, cpu_threads=cpu_threads)
+    except Exception as e:
+        logger.error(f"Error while starting bulk transcription worker {os.getpid()}: {e}", exc_info=True)
+        loaded = False
+    if not loaded:
+        # Raising here would make the pool respawn the worker forever, the parent stops the run instead
+        logger.error(f"Worker {os.getpid()} failed to load Whisper")
+        load_failed.set()
+        return
+    _service = service
+    _processor = TranscriptionProcessor()
+
+
+def _next_record(results, load_failed):
+    """Next finished record, or None once a worker has failed to load Whisper."""
+    while True:
+        try:
+            return results.next(timeout=1)
+        except multiprocessing.TimeoutError:
+            if load_failed.is_set():
+                return None
+
+
+def _transcribe_file(job):
+    if _service is None:
+        # This worker failed to load Whisper, leave the file for the next run
+        return None
+    path = job["path"]
+    call_type, model_type, turn_number = job["call_type"], job["model_type"], job["turn_number"]
+    record = {
+        "path": path,
+        "uuid": Path(path).stem,
+        "call_type": call_type,
+        "model_type": model_type,
+        "turn_number": turn_number,
+        "error": None,
+    }
+    try:
+        start_time = time.time()
+        transcribed_text, transcription_info = _service.transcribe_audio(
+            path, call_type, model_type, turn_number
+        )
+        record["transcription_time"] = time.time() - start_time
+        record["transcription"] = transcribed_text
+
+        classification_start_time = time.time()
+        label, confidence, processed_transcribed_text, model_used = _processor.label_transcription(
+            transcribed_text, transcription_info, record["uuid"], model_type, call_type, turn_number
+        )
+        record.update({
+            "label": label,
+            "confidence": confidence,
+            "processed_transcribed_text": processed_transcribed_text,
+            "model_used": model_used,
+            "classification_time": time.time() - classification_start_time,
+            "transcription_info": transcription_info,
+        })
+    except Exception as e:
+        logger.error(f"An error occurred during bulk transcription of {path}: {e}")
+        record["error"] = str(e)
+    return record
+
+
+def build_jobs(files, args, manifest, done):
+    jobs = []
+    for path in files:
+        path = os.path.abspath(path)
+        if path in done:
+            continue
+        entry = manifest.get(path, {})
+        jobs.append({
+            "path": path,
+            "call_type": entry.get("call_type", args.call_type),
+            "model_type": entry.get("model_type", args.model_type),
+            "turn_number": int(entry.get("turn_number", args.turn_number)),
+        })
+    return jobs
+
+
+def run(args):
+    files = find_audio_files(args.input_dir)
+    manifest = load_manifest(args.manifest) if args.manifest else {}
+    done = load_checkpoint(args.output, args.retry_errors)
+    jobs = build_jobs(files, args, manifest, done)
+    logger.info(f"Found {len(files)} audio files, {len(files) - len(jobs)} already in {args.output}, "
+                f"{len(jobs)} to transcribe")
+    if not jobs:
+        return 0
+
+    workers = max(1, min(args.workers, len(jobs)))
+    # Each worker gets an even share of the cores for CTranslate2's intra-op threads
+    cpu_threads = args.cpu_threads or max(1, (os.cpu_count() or 1) // workers)
+    logger.info(f"Starting {workers} workers with {cpu_threads} CPU threads each, "
+                f"model {args.model_size or 'routed by WHISPER_MODEL_TABLE'}")
+
+    failed = 0
+    audio_seconds = 0.0
+    start_time = time.time()
+    # spawn rather than fork: CTranslate2 and torch thread pools do not survive a fork
+    context = multiprocessing.get_context("spawn")
+    load_failed = context.Event()
+    with context.Pool(
+        workers,
+        initializer=_init_worker,
+        initargs=(args.model_size, args.compute_type, cpu_threads, args.classification_url, load_failed),
+    ) as pool, open(args.output, "a") as output:
+        results = pool.imap_unordered(_transcribe_file, jobs, chunksize=1)
+        for completed in range(1, len(jobs) + 1):
+            record = _next_record(results, load_failed)
+            if record is None:
+                logger.error(f"A worker failed to load Whisper, stopping after {completed - 1} files")
+                return 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            if record["error"]:
+                failed += 1
+            else:
+                audio_seconds += record["transcription_info"].get("original_seconds", 0.0)
+            if completed % args.report_every == 0 or completed == len(jobs):
+                elapsed = time.time() - start_time
+                logger.info(f"{completed}/{len(jobs)} files, {failed} failed, "
+                            f"{completed / elapsed:.2f} files/sec, "
+                            f"{audio_seconds / elapsed:.1f} audio seconds/sec")
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe and label a directory of call recordings.")
+    parser.add_argument("input_dir", help="Directory searched recursively for audio files")
+    parser.add_argument("output", help="JSONL results file, appended to and used as the checkpoint")
+    parser.add_argument("--call-type", default="medicare")
+    parser.add_argument("--model-type", default="A")
+    parser.add_argument("--turn-number", type=int, default=1)
+    parser.add_argument("--manifest", help="JSONL of per-file path, call_type, model_type and turn_number")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4))
+    parser.add_argument("--cpu-threads", type=int, default=0,
+                        help="Threads per worker, by default an even share of the cores")
+    parser.add_argument("--model-size", default=None,
+                        help="Use this one Whisper model for every turn, by default routed like the API")
+    parser.add_argument("--compute-type", default=None)
+    parser.add_argument("--classification-url", default=None,
+                        help=f"Classification endpoint, by default {c.CLASSIFICATION_URL}")
+    parser.add_argument("--retry-errors", action="store_true", help="Redo files whose previous result failed")
+    parser.add_argument("--report-every", type=int, default=50)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(run(parse_args()))
@@ -2,18 +2,41 @@ import asyncio
 import time
 import sys
 
-from fastapi import FastAPI, BackgroundTasks, Request, HTTPException
+from fastapi import FastAPI, BackgroundTasks, Request, HTTPException, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from voiceflow_ai.routers import classification_router
 from voiceflow_ai.core.dependencies import get_classification_service
 from voiceflow_ai.core.logger import get_logger
+from voiceflow_ai.core.metrics import CONTENT_TYPE, REGISTRY
 
 app = FastAPI()
 
 classification_service = get_classification_service()
 logger = get_logger("classification")
 
+REGISTRY.callback(
+    "voiceflow_classifications_active", "Classifications currently running", "gauge",
+    lambda: classification_service.active_classifications_count,
+)
+REGISTRY.callback(
+    "voiceflow_classification_batch_queue_depth", "Utterances queued for a DistilBERT micro-batch", "gauge",
+    lambda: {(name,): batcher.queue_depth for name, batcher in list(classification_service.batchers.items())},
+    ["model"],
+)
+REGISTRY.callback(
+    "voiceflow_classification_models_loaded", "DistilBERT models resident in memory", "gauge",
+    lambda: len(classification_service.registry.loaded),
+)
+REGISTRY.callback(
+    "voiceflow_classification_model_memory_bytes", "Parameter memory of resident DistilBERT models", "gauge",
+    lambda: classification_service.registry.memory_used(),
+)
+REGISTRY.callback(
+    "voiceflow_classification_model_evictions_total", "DistilBERT models evicted for the memory budget", "counter",
+    lambda: classification_service.registry.evictions,
+)
+
 
 async def startup_event():
     classification_service.initialize_model()
@@ -32,7 +55,7 @@ app.include_router(classification_router.router)
 
 @app.get("/health")
 async def health_check():
-    if (classification_service.distil_model is not None and
+    if (classification_service.ready and
         not classification_service.shutdown_in_progress and
         (not classification_service.active_classifications or
          time.time() - classification_service.active_classifications[0] <= 1)):
@@ -41,6 +64,11 @@ async def health_check():
         raise HTTPException(status_code=500, detail="Service is unhealthy")
 
 
+@app.get("/metrics")
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.post("/shutdown")
 async def shutdown(background_tasks: BackgroundTasks):
     logger.info("Shutdown signal received")
@@ -66,11 +94,11 @@ async def exception_handler(request: Request, exc: Exception):
 
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
-        if request.url.path != "/health":
+        if request.url.path not in ("/health", "/metrics"):
             logger.debug(f"Processing request: {request.method} {request.url}",
                          extra={"serial_number": request.get("serial_number")})
         response = await call_next(request)
-        if request.url.path != "/health":
+        if request.url.path not in ("/health", "/metrics"):
             logger.debug(f"Request processed: {response.status_code}",
                          extra={"serial_number": request.get("serial_number")})
         return response
@@ -0,0 +1,66 @@
+import asyncio
+import contextlib
+import math
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get an inference slot in time."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded inference queue.
+
+    At most ``max_concurrency`` requests hold a slot, at most ``max_queue_depth`` wait for
+    one, and none waits longer than ``max_wait_seconds``. Everything else is rejected right
+    away so the caller can go to another replica.
+    """
+
+    def __init__(self, max_concurrency, max_queue_depth, max_wait_seconds):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.rejected = 0
+
+    @property
+    def retry_after(self):
+        return max(1, math.ceil(self.max_wait_seconds))
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self.waiting >= self.max_queue_depth:
+            self.rejected += 1
+            raise AdmissionRejected(f"Inference queue is full ({self.waiting} waiting)", self.retry_after)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"No inference slot within {self.max_wait_seconds}s", self.retry_after
+            ) from None
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "max_wait_seconds": self.max_wait_seconds,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
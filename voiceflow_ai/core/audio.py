@@ -0,0 +1,195 @@
+import io
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def load_audio(audio):
+    """Return a 16 kHz mono float32 array from a path, file object or an already decoded array."""
+    if isinstance(audio, np.ndarray):
+        return audio.astype(np.float32, copy=False)
+    if isinstance(audio, os.PathLike):
+        audio = os.fspath(audio)
+    # Imported here so the NumPy-only helpers below load without faster-whisper and PyAV
+    from faster_whisper import decode_audio
+
+    return decode_audio(audio, sampling_rate=SAMPLE_RATE)
+
+
+def decode_audio_bytes(data):
+    """Decode an uploaded audio container held in memory, without a disk round trip.
+
+    PCM WAV, which is what the dialer sends, is parsed with the standard library and then
+    downmixed and resampled with NumPy. Anything else goes through PyAV.
+    """
+    try:
+        samples, sample_rate = read_wav(data)
+    except (wave.Error, EOFError, ValueError):
+        from faster_whisper import decode_audio
+
+        return decode_audio(io.BytesIO(data), sampling_rate=SAMPLE_RATE)
+    return resample(downmix(samples), sample_rate)
+
+
+def read_wav(data):
+    """Parse PCM WAV bytes into a (frames, channels) float32 array and its sample rate."""
+    with wave.open(io.BytesIO(data)) as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        frames = wav.readframes(wav.getnframes())
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+    return samples.reshape(-1, channels), sample_rate
+
+
+def downmix(samples):
+    return samples.mean(axis=1, dtype=np.float32) if samples.ndim == 2 else samples
+
+
+def duration_seconds(audio):
+    return len(audio) / SAMPLE_RATE
+
+
+def pcm16_to_float32(data):
+    """Convert little-endian 16-bit PCM bytes to float32 samples in [-1, 1)."""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _mulaw_table():
+    """G.711 mu-law byte to float32 sample, for all 256 codes."""
+    code = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (code >> 4) & 0x07
+    mantissa = code & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return (np.where(code & 0x80, -magnitude, magnitude) / 32768.0).astype(np.float32)
+
+
+MULAW_TABLE = _mulaw_table()
+
+
+def mulaw_to_float32(data):
+    """Convert G.711 mu-law bytes to float32 samples with a table lookup."""
+    return MULAW_TABLE[np.frombuffer(data, dtype=np.uint8)]
+
+
+# Headerless encodings accepted from the telephony platform, with their bytes per sample
+RAW_ENCODINGS = {
+    "mulaw": (mulaw_to_float32, 1),
+    "pcm_s16le": (pcm16_to_float32, 2),
+}
+
+
+def decode_raw(data, encoding, sample_rate):
+    """Decode headerless mono mu-law or 16-bit PCM straight to 16 kHz float32, without a container."""
+    if encoding not in RAW_ENCODINGS:
+        raise ValueError(f"Unsupported raw encoding: {encoding}, expected one of {sorted(RAW_ENCODINGS)}")
+    convert, sample_width = RAW_ENCODINGS[encoding]
+    # Drop a trailing partial sample rather than failing the whole upload
+    data = data[:len(data) - len(data) % sample_width]
+    return resample(convert(data), sample_rate)
+
+
+def lowpass_kernel(cutoff, zero_crossings=16):
+    """Hann-windowed sinc low-pass FIR, ``cutoff`` in cycles per sample, with unit DC gain."""
+    half_width = int(np.ceil(zero_crossings / (2 * cutoff)))
+    n = np.arange(-half_width, half_width + 1, dtype=np.float64)
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hanning(len(n))
+    return kernel / kernel.sum()
+
+
+def resample(audio, orig_sr, target_sr=SAMPLE_RATE, rolloff=0.9):
+    """Resample with a windowed-sinc low-pass filter at ``rolloff`` times the lower Nyquist frequency.
+
+    Integer upsampling, which is what telephony audio (8 kHz) goes through, inserts zeros and
+    filters out the spectral images above the source Nyquist frequency. Other ratios use linear
+    interpolation, filtered before it when downsampling so content above the target Nyquist
+    frequency does not alias into the speech band, and after it when upsampling.
+    """
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio
+    if orig_sr < target_sr:
+        kernel = lowpass_kernel(rolloff * orig_sr / (2 * target_sr)).astype(np.float32)
+        if target_sr % orig_sr == 0:
+            factor = target_sr // orig_sr
+            upsampled = np.zeros(len(audio) * factor, dtype=np.float32)
+            upsampled[::factor] = audio
+            # The gain makes up for the inserted zeros
+            return np.convolve(upsampled, kernel * factor, mode="same")
+        return np.convolve(_interpolate(audio, orig_sr, target_sr), kernel, mode="same")
+    kernel = lowpass_kernel(rolloff * target_sr / (2 * orig_sr))
+    return _interpolate(np.convolve(audio, kernel.astype(np.float32), mode="same"), orig_sr, target_sr)
+
+
+def _interpolate(audio, orig_sr, target_sr):
+    n_out = int(round(len(audio) * target_sr / orig_sr))
+    positions = np.arange(n_out, dtype=np.float64) * (orig_sr / target_sr)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+def frame_signal(audio, frame_length, hop_length):
+    """Split audio into overlapping frames as a strided view, padding the tail with zeros."""
+    if len(audio) < frame_length:
+        audio = np.pad(audio, (0, frame_length - len(audio)))
+    n_frames = 1 + (len(audio) - frame_length) // hop_length
+    return np.lib.stride_tricks.as_strided(
+        audio,
+        shape=(n_frames, frame_length),
+        strides=(audio.strides[0] * hop_length, audio.strides[0]),
+        writeable=False,
+    )
+
+
+def frame_energy_db(audio, frame_ms=30, sample_rate=SAMPLE_RATE):
+    """RMS energy of non-overlapping frames in dBFS."""
+    frame_length = int(sample_rate * frame_ms / 1000)
+    frames = frame_signal(audio, frame_length, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10)), frames
+
+
+def detect_speech(audio, energy_threshold_db=-45.0, min_speech_ms=150, frame_ms=30,
+                  zcr_min=0.02, zcr_max=0.35, sample_rate=SAMPLE_RATE):
+    """Cheap speech gate from frame energy and zero-crossing rate.
+
+    A frame counts as voiced when it is louder than ``energy_threshold_db`` and its
+    zero-crossing rate falls in the range of speech, which rejects low-frequency hum and
+    broadband hiss. Tones such as answering machine beeps still pass, since they carry a
+    label of their own. Returns whether at least ``min_speech_ms`` of voiced frames were
+    found, and the voiced duration in seconds.
+    """
+    if len(audio) == 0:
+        return False, 0.0
+    energy_db, frames = frame_energy_db(audio, frame_ms, sample_rate)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    voiced = (energy_db > energy_threshold_db) & (zcr >= zcr_min) & (zcr <= zcr_max)
+    voiced_seconds = float(np.count_nonzero(voiced) * frame_ms / 1000)
+    return voiced_seconds * 1000 >= min_speech_ms, voiced_seconds
+
+
+def trim_silence(audio, threshold_db=-45.0, padding_ms=200, frame_ms=30, sample_rate=SAMPLE_RATE):
+    """Drop leading and trailing frames quieter than ``threshold_db``, keeping ``padding_ms`` of context.
+
+    Audio without any frame above the threshold is returned unchanged for the speech gate to judge.
+    """
+    if len(audio) == 0:
+        return audio
+    energy_db, _ = frame_energy_db(audio, frame_ms, sample_rate)
+    loud = np.flatnonzero(energy_db > threshold_db)
+    if len(loud) == 0:
+        return audio
+    frame_length = int(sample_rate * frame_ms / 1000)
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, loud[0] * frame_length - padding)
+    end = min(len(audio), (loud[-1] + 1) * frame_length + padding)
+    return audio[start:end]
@@ -0,0 +1,96 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from voiceflow_ai.core.logger import get_logger
+
+logger = get_logger("batching")
+
+
+class MicroBatcher:
+    """Collect concurrent requests for a short window and process them as one batch."""
+
+    def __init__(self, process_batch, max_batch_size=8, max_wait_ms=10, name="micro-batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"{self.name} started with max batch size {self.max_batch_size} "
+                    f"and max wait {self.max_wait * 1000:.0f}ms")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, item):
+        """Queue an item and return a Future that resolves to its own result."""
+        future = Future()
+        if self._thread is None:
+            future.set_exception(RuntimeError(f"{self.name} is not running"))
+            return future
+        self._queue.put((item, future))
+        return future
+
+    def _run(self):
+        running = True
+        while running:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    running = False
+                    break
+                batch.append(entry)
+            self._dispatch(batch)
+
+        # Fail whatever is still waiting so no caller blocks forever
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None:
+                entry[1].set_exception(RuntimeError(f"{self.name} stopped"))
+
+    def _dispatch(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.process_batch(items)
+        except Exception as e:
+            logger.error(f"Error while processing a batch of {len(items)} in {self.name}: {e}",
+                         exc_info=True)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
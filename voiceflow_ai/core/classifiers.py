@@ -0,0 +1,651 @@
+import collections
+import gc
+import threading
+
+import torch
+from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+from voiceflow_ai.core import onnx_backend
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.logger import get_logger
+
+logger = get_logger("classifiers")
+
+# A classifier is a model from CLASSIFIER_MODELS, the label schema of its output classes and
+# the model_used tag reported with its labels
+Classifier = collections.namedtuple("Classifier", ["model", "labels", "model_used"])
+
+# Any value in a CLASSIFIER_TABLE key position
+ANY = "*"
+
+LABELS_MEDICARE_18 = {
+    0: "ABN",
+    1: "AD",
+    2: "AM",
+    3: "ANI",
+    4: "AP",
+    5: "BOT",
+    6: "CB",
+    7: "COM",
+    8: "CONF",
+    9: "DNC",
+    10: "N",
+    11: "N-",
+    12: "NE",
+    13: "NI",
+    14: "PN",
+    15: "P",
+    16: "PQ",
+    17: "U",
+}
+
+LABELS_MEDICARE_84 = {
+    0: "NQD",
+    1: "AD",
+    2: "AM",
+    3: "DP",
+    4: "AP1",
+    5: "BOT",
+    6: "CB",
+    7: "COM",
+    8: "CONF",
+    9: "DNC",
+    10: "N",
+    11: "N-",
+    12: "NE",
+    13: "GNI",
+    14: "PN",
+    15: "P",
+    16: "PQ",
+    17: "U",
+    18: "TMC",
+    19: "YJC",
+    20: "AHM",
+    21: "AHI",
+    22: "AB",
+    23: "JL",
+    24: "PG",
+    25: "NG",
+    26: "PG+",
+    27: "NQA",
+    28: "NQNH",
+    29: "TC",
+    30: "Q",
+    31: "R",
+    32: "LB",
+    33: "AP2",
+    34: "AP3",
+    35: "AP4",
+    36: "AP5",
+    37: "AP6",
+    38: "ABCD",
+    39: "WHO",
+    40: "ADV",
+    41: "WANT",
+    42: "BENE",
+    43: "AGNT",
+    44: "SEC",
+    45: "WHOM",
+    46: "HOW",
+    47: "COST",
+    48: "SCAM",
+    49: "TELE",
+    50: "AP7",
+    51: "ANI2",
+    52: "ANI3",
+    53: "ANI4",
+    54: "ANI5",
+    55: "ANI6",
+    56: "ANI7",
+    57: "DIS",
+    58: "DVH",
+    59: "ENRL",
+    60: "ITM",
+    61: "MAID",
+    62: "MCARE",
+    63: "MDCP",
+    64: "MM",
+    65: "MTC",
+    66: "PNI",
+    67: "QA",
+    68: "SUPL",
+    69: "UDK",
+    70: "ANI1",
+    71: "NQI",
+    72: "ABNI",
+    73: "B",
+    74: "CE",
+    75: "CQ",
+    76: "HOLD",
+    77: "HU",
+    78: "PCOST",
+    79: "PCQ",
+    80: "PTIME",
+    81: "TIME",
+    82: "FD",
+    83: "BDNC",
+}
+
+LABELS_MEDICARE_75 = {
+    0: "AB",
+    1: "ABCD",
+    2: "ABNI",
+    3: "AD",
+    4: "ADV",
+    5: "AGNT",
+    6: "AHI",
+    7: "AHM",
+    8: "AM",
+    9: "ANI1",
+    10: "ANI2",
+    11: "ANI3",
+    12: "ANI4",
+    13: "ANI5",
+    14: "ANI6",
+    15: "ANI7",
+    16: "AP1",
+    17: "AP2",
+    18: "AP3",
+    19: "AP4",
+    20: "AP5",
+    21: "AP6",
+    22: "AP7",
+    23: "B",
+    24: "BDNC",
+    25: "BENE",
+    26: "BN",
+    27: "BOT",
+    28: "CB",
+    29: "CE",
+    30: "COM",
+    31: "CONF",
+    32: "CQ",
+    33: "DIS",
+    34: "DNC",
+    35: "DP",
+    36: "DVH",
+    37: "ENRL",
+    38: "FD",
+    39: "GNI",
+    40: "HOLD",
+    41: "HU",
+    42: "ITM",
+    43: "JL",
+    44: "LB",
+    45: "MAID",
+    46: "MCARE",
+    47: "MM",
+    48: "MTC",
+    49: "N",
+    50: "N-",
+    51: "NE",
+    52: "NG",
+    53: "NQA",
+    54: "NQD",
+    55: "NQI",
+    56: "P",
+    57: "PCOST",
+    58: "PG",
+    59: "PG+",
+    60: "PN",
+    61: "PNI",
+    62: "PQ",
+    63: "PTIME",
+    64: "Q",
+    65: "QA",
+    66: "R",
+    67: "SCAM",
+    68: "SEC",
+    69: "SUPL",
+    70: "TC",
+    71: "TELE",
+    72: "TMC",
+    73: "U",
+    74: "YJC",
+}
+
+LABELS_MEDICARE_25 = {
+    0: "ABN",
+    1: "AD",
+    2: "AM",
+    3: "ANI",
+    4: "AP",
+    5: "BOT",
+    6: "CB",
+    7: "CDC",
+    8: "COM",
+    9: "CONF",
+    10: "DNC",
+    11: "LB",
+    12: "N",
+    13: "N-",
+    14: "NE",
+    15: "NI",
+    16: "NIC",
+    17: "NIE",
+    18: "NUM",
+    19: "P",
+    20: "PN",
+    21: "PQ",
+    22: "QR",
+    23: "SC",
+    24: "U",
+}
+
+LABELS_MEDICARE_27 = {
+    0: "N",
+    1: "N2",
+    2: "N-",
+    3: "U",
+    4: "CB-M",
+    5: "CB-S",
+    6: "NI-A",
+    7: "NI",
+    8: "NI-REPEAT",
+    9: "SCAM",
+    10: "AI",
+    11: "COM",
+    12: "ABN",
+    13: "AD",
+    14: "AM",
+    15: "DNC",
+    16: "P",
+    17: "PN",
+    18: "NE-AGE",
+    19: "NE",
+    20: "PQ",
+    21: "NI-AGE",
+    22: "BC",
+    23: "AP",
+    24: "CONF-DNU",
+    25: "CONF-DNK",
+    26: "LB",
+}
+
+LABELS_ACA_33 = {
+    0: "NQI",
+    1: "AD",
+    2: "AM",
+    3: "WP",
+    4: "AP",
+    5: "BOT",
+    6: "CB",
+    7: "COM",
+    8: "CONF",
+    9: "DNC",
+    10: "N",
+    11: "N-",
+    12: "NE",
+    13: "GNI",
+    14: "PN",
+    15: "P",
+    16: "PQ",
+    17: "U",
+    18: "TMC",
+    19: "YJC",
+    20: "AHA",
+    21: "AHI",
+    22: "PI",
+    23: "JL",
+    24: "PG",
+    25: "NG",
+    26: "PG+",
+    27: "NQA",
+    28: "NQW",
+    29: "TC",
+    30: "Q",
+    31: "R",
+    32: "LB",
+}
+
+LABELS_ACA_50 = {
+    0: "ACA",
+    1: "ACE",
+    2: "AD",
+    3: "AGNT",
+    4: "AHA",
+    5: "AHI",
+    6: "AM",
+    7: "AP",
+    8: "B",
+    9: "BDNC",
+    10: "BENE",
+    11: "BN",
+    12: "BOT",
+    13: "CB",
+    14: "CE",
+    15: "COM",
+    16: "CONF",
+    17: "COST",
+    18: "CQ",
+    19: "DNC",
+    20: "ELI",
+    21: "FD",
+    22: "GNI",
+    23: "HOLD",
+    24: "ICE",
+    25: "IHG",
+    26: "JL",
+    27: "LB",
+    28: "N",
+    29: "N-",
+    30: "NE",
+    31: "NG",
+    32: "NQA",
+    33: "NQI",
+    34: "P",
+    35: "PG",
+    36: "PG+",
+    37: "PN",
+    38: "Q",
+    39: "QP",
+    40: "R",
+    41: "SCAM",
+    42: "SEC",
+    43: "SUB",
+    44: "TC",
+    45: "TELE",
+    46: "TIME",
+    47: "TMC",
+    48: "U",
+    49: "YJC",
+}
+
+LABELS_FE_50 = {
+    0: "NQD",
+    1: "AD",
+    2: "AM",
+    3: "DP",
+    4: "AP1",
+    5: "BOT",
+    6: "CB",
+    7: "COM",
+    8: "CONF",
+    9: "DNC",
+    10: "N",
+    11: "N-",
+    12: "NE",
+    13: "GNI",
+    14: "PN",
+    15: "P",
+    16: "PQ",
+    17: "U",
+    18: "TMC",
+    19: "YJC",
+    20: "AHFE",
+    21: "AHI",
+    22: "AHLI",
+    23: "JL",
+    24: "PG",
+    25: "NG",
+    26: "PG+",
+    27: "NQA",
+    28: "NQNH",
+    29: "TC",
+    30: "Q",
+    31: "R",
+    32: "LB",
+    33: "AP2",
+    34: "AP3",
+    35: "AP4",
+    36: "AP5",
+    37: "AP6",
+    38: "NAS",
+    39: "WHO",
+    40: "CASH",
+    41: "WANT",
+    42: "BENE",
+    43: "OI",
+    44: "SEC",
+    45: "WHOM",
+    46: "HOW",
+    47: "DIE",
+    48: "SCAM",
+    49: "TELE",
+}
+
+LABELS_3 = {0: "non-sales", 1: "sales", 2: "neutral"}
+
+# Model name -> fine-tuned DistilBERT checkpoint
+CLASSIFIER_MODELS = {
+    "distil": c.DISTIL_MODEL,
+    "medicare": c.MEDICARE_MODEL,
+    "medicare_b": c.MEDICARE_MODEL_B,
+    "medicare_11": c.MEDICARE_MODEL_11,
+    "medicare_12": c.MEDICARE_MODEL_12,
+    "aca": c.ACA_MODEL,
+    "aca_b": c.ACA_MODEL_B,
+    "fe_b": c.FE_MODEL_B,
+}
+
+# (call_type, model_type) -> Classifier, looked up exactly, then with ANY model type, then ANY/ANY
+CLASSIFIER_TABLE = {
+    ("medicare", "A"): Classifier("distil", LABELS_MEDICARE_18, "mc_10.3"),
+    ("medicare", "B"): Classifier("medicare", LABELS_MEDICARE_84, "mc2_3.3"),
+    ("medicare", "C"): Classifier("medicare_b", LABELS_MEDICARE_75, "mc2_8.3"),
+    ("medicare", "11"): Classifier("medicare_11", LABELS_MEDICARE_25, "medicare11"),
+    ("medicare", "12"): Classifier("medicare_12", LABELS_MEDICARE_27, "medicare12"),
+    ("medicare", ANY): Classifier("distil", LABELS_MEDICARE_18, "E-medicare"),
+    ("aca", "A"): Classifier("aca", LABELS_ACA_33, "aca_5.3"),
+    ("aca", "B"): Classifier("aca_b", LABELS_ACA_50, "aca2_3.2"),
+    ("aca", ANY): Classifier("aca", LABELS_ACA_33, "E-aca"),
+    ("fe", "A"): Classifier("fe_b", LABELS_FE_50, "A-fe"),
+    ("fe", "B"): Classifier("fe_b", LABELS_FE_50, "B-fe"),
+    ("fe", ANY): Classifier("fe_b", LABELS_FE_50, "E-fe"),
+    (ANY, ANY): Classifier("distil", None, "A"),
+}
+
+
+def model_size_bytes(model):
+    if isinstance(model, onnx_backend.OnnxModel):
+        return model.size_bytes()
+    if isinstance(model, SharedBackboneModel):
+        # The backbone is shared and accounted for once by the registry
+        model = model.head
+    # Quantized Linear weights are packed params in the state dict, not parameters or buffers
+    tensors = []
+    for value in model.state_dict().values():
+        tensors.extend(value if isinstance(value, tuple) else (value,))
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors if isinstance(tensor, torch.Tensor))
+
+
+def quantize_int8(model):
+    """Dynamically quantized copy of a model, int8 weights for every Linear layer, CPU only."""
+    model.to("cpu")
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def backend_name(model):
+    if isinstance(model, onnx_backend.OnnxModel):
+        return "onnx"
+    if any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in model.modules()):
+        return "int8"
+    return "torch"
+
+
+class ClassificationHead(torch.nn.Module):
+    """The pre_classifier + classifier layers of a DistilBertForSequenceClassification."""
+
+    def __init__(self, pre_classifier, classifier):
+        super().__init__()
+        self.pre_classifier = pre_classifier
+        self.classifier = classifier
+
+    def forward(self, pooled):
+        # Same as DistilBertForSequenceClassification in eval mode, where dropout is a no-op
+        return self.classifier(torch.nn.functional.relu(self.pre_classifier(pooled)))
+
+
+class SharedBackboneModel(torch.nn.Module):
+    """A variant's head on the shared DistilBERT encoder, called like the full model."""
+
+    def __init__(self, backbone, head):
+        super().__init__()
+        self.backbone = backbone
+        self.head = head
+
+    def forward(self, input_ids=None, attention_mask=None, **kwargs):
+        hidden_state = self.backbone(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        return SequenceClassifierOutput(logits=self.head(hidden_state[:, 0]))
+
+
+class ClassifierRegistry:
+    """Classifier table with models loaded on first use and evicted least recently used.
+
+    Loaded models are kept while their combined parameter size fits in ``memory_budget_mb``
+    (by default CLASSIFIER_MEMORY_BUDGET_MB, None keeps every model); the model just requested
+    is never evicted, so one model over budget still serves.
+    """
+
+    def __init__(self, models=None, table=None, memory_budget_mb=None):
+        self.models = CLASSIFIER_MODELS if models is None else models
+        self.table = CLASSIFIER_TABLE if table is None else table
+        budget_mb = c.CLASSIFIER_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+        self.memory_budget = budget_mb * 2 ** 20 if budget_mb is not None else None
+        # Model name -> (model, tokenizer, size in bytes), most recently used last
+        self.loaded = collections.OrderedDict()
+        # Shared encoder and tokenizer, and model name -> ClassificationHead, never evicted
+        self.backbone = None
+        self.backbone_tokenizer = None
+        self.heads = {}
+        self.loads = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._load_locks = collections.defaultdict(threading.Lock)
+
+    def lookup(self, call_type, model_type):
+        for key in ((call_type, model_type), (call_type, ANY), (ANY, ANY)):
+            if key in self.table:
+                return self.table[key]
+        return None
+
+    def get(self, name):
+        """Return (model, tokenizer) for a model name, loading it and evicting others if needed."""
+        with self._lock:
+            if name in self.loaded:
+                self.loaded.move_to_end(name)
+                return self.loaded[name][:2]
+        # Loads of different models run in parallel, concurrent loads of the same one wait
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self.loaded:
+                    self.loaded.move_to_end(name)
+                    return self.loaded[name][:2]
+            model, tokenizer = self._load(name)
+            with self._lock:
+                self.loaded[name] = (model, tokenizer, model_size_bytes(model))
+                self.loads += 1
+                self._evict(keep=name)
+        return model, tokenizer
+
+    def _load(self, name):
+        path = self.models.get(name)
+        if not path:
+            raise ValueError(f"No checkpoint configured for classification model {name}")
+        if name in c.CLASSIFIER_HEAD_ONLY_MODELS:
+            backbone, tokenizer = self.shared_backbone()
+            model = SharedBackboneModel(backbone, self.head(name))
+        else:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = AutoModelForSequenceClassification.from_pretrained(path)
+            model.to(device)  # Move the model to the GPU
+            model.eval()
+            tokenizer = AutoTokenizer.from_pretrained(path)
+            logger.info(f"Loaded classification model {name} from {path} on {device}, "
+                        f"{model_size_bytes(model) / 2 ** 20:.0f} MB")
+        backend = c.CLASSIFIER_BACKENDS.get(name, "torch")
+        if backend == "onnx":
+            if isinstance(model, SharedBackboneModel):
+                # Exporting would write a copy of the shared backbone for every head-only model
+                logger.warning(f"Head-only classification model {name} is not exported to ONNX, "
+                               f"serving it with PyTorch")
+            else:
+                model = onnx_backend.to_onnx(name, path, model, tokenizer)
+        elif backend == "int8":
+            if torch.cuda.is_available():
+                logger.warning(f"int8 classification model {name} needs the CPU, serving it in fp32 on the GPU")
+            elif isinstance(model, SharedBackboneModel):
+                # Quantizing would copy the shared backbone into every head-only model
+                logger.warning(f"Head-only classification model {name} is not quantized, serving it in fp32")
+            else:
+                model = quantize_int8(model)
+                logger.info(f"Quantized classification model {name} to int8, "
+                            f"{model_size_bytes(model) / 2 ** 20:.0f} MB")
+        return model, tokenizer
+
+    def shared_backbone(self):
+        """The CLASSIFIER_BACKBONE encoder and tokenizer, loaded once."""
+        with self._load_locks["backbone"]:
+            if self.backbone is None:
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                backbone = AutoModel.from_pretrained(c.CLASSIFIER_BACKBONE)
+                backbone.to(device)
+                backbone.eval()
+                self.backbone_tokenizer = AutoTokenizer.from_pretrained(c.CLASSIFIER_BACKBONE)
+                with self._lock:
+                    self.backbone = backbone
+                logger.info(f"Loaded shared classification backbone {c.CLASSIFIER_BACKBONE} on {device}, "
+                            f"{model_size_bytes(backbone) / 2 ** 20:.0f} MB")
+        return self.backbone, self.backbone_tokenizer
+
+    def head(self, name):
+        """The classification head of a model's checkpoint, without its encoder."""
+        with self._load_locks[f"head:{name}"]:
+            if name not in self.heads:
+                path = self.models.get(name)
+                if not path:
+                    raise ValueError(f"No checkpoint configured for classification model {name}")
+                model = AutoModelForSequenceClassification.from_pretrained(path)
+                if not hasattr(model, "pre_classifier"):
+                    raise ValueError(f"Classification model {name} is not a DistilBERT sequence classifier")
+                head = ClassificationHead(model.pre_classifier, model.classifier)
+                head.to("cuda" if torch.cuda.is_available() else "cpu")
+                head.eval()
+                # Only the head is kept, the checkpoint's own encoder is dropped here
+                with self._lock:
+                    self.heads[name] = head
+                logger.info(f"Loaded classification head {name} from {path}")
+        return self.heads[name]
+
+    def _evict(self, keep):
+        if self.memory_budget is None:
+            return
+        evicted = False
+        while self._memory_used() > self.memory_budget and len(self.loaded) > 1:
+            name = next(iter(self.loaded))
+            if name == keep:
+                self.loaded.move_to_end(name)
+                continue
+            del self.loaded[name]
+            self.evictions += 1
+            evicted = True
+            logger.info(f"Evicted classification model {name} to stay within the memory budget")
+        if evicted:
+            # In-flight batches still hold their model, memory is released once they finish
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def memory_used(self):
+        # Read by the metrics scrape while request threads load and evict models
+        with self._lock:
+            return self._memory_used()
+
+    def _memory_used(self):
+        shared = [self.backbone] if self.backbone is not None else []
+        return (sum(size for _, _, size in self.loaded.values())
+                + sum(model_size_bytes(module) for module in (*shared, *self.heads.values())))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": list(self.loaded),
+                "backbone": c.CLASSIFIER_BACKBONE if self.backbone is not None else None,
+                "heads": list(self.heads),
+                "backends": {name: backend_name(model) for name, (model, _, _) in self.loaded.items()},
+                "memory_used_mb": self._memory_used() / 2 ** 20,
+                "memory_budget_mb": self.memory_budget / 2 ** 20 if self.memory_budget is not None else None,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
@@ -1,4 +1,5 @@
 # config.py
+import os
 from pathlib import Path
 
 
@@ -22,6 +23,167 @@ class Settings:
     MODEL_FILE_ID = ""
     MODEL_COUNT: int = 2
     TYPE = True
+    CLASSIFICATION_URL = "http://voiceflow_classification:9000/classify/"
+
+    # Whisper decoding
+    SUPPRESS_TOKENS = [0, 11, 13, 30]
+    # Model for turns missing from WHISPER_MODEL_TABLE
+    WHISPER_MODEL_SIZE = "small.en"
+    # (call_type, turn_number) -> Whisper model, "*" matches any call type or turn. Every model
+    # named here is loaded and warmed at startup; they must share the default model's tokenizer.
+    WHISPER_MODEL_TABLE = {
+        ("*", 1): "base.en",
+        ("medicare", 4): "small.en",
+        ("aca", 5): "small.en",
+        ("aca", 6): "small.en",
+    }
+
+    # "local" loads Whisper in every front end, "remote" forwards inference to the node's
+    # model server (python -m voiceflow_ai.model_server) over MODEL_SERVER_ADDRESS, which is a
+    # Unix socket path or host:port
+    TRANSCRIPTION_MODE = os.environ.get("VOICEFLOW_TRANSCRIPTION_MODE", "local")
+    MODEL_SERVER_ADDRESS = os.environ.get("VOICEFLOW_MODEL_SERVER_ADDRESS", "/var/run/voiceflow/model-server.sock")
+    # Connections are unpickled, so a host:port address requires an explicit authkey. A Unix
+    # socket without one is protected by its file permissions (owner and group only).
+    MODEL_SERVER_AUTHKEY = os.environ.get("VOICEFLOW_MODEL_SERVER_AUTHKEY", "").encode() or None
+    # How long a front end waits for the model server to come up at startup
+    MODEL_SERVER_CONNECT_TIMEOUT_SECONDS = 300
+
+    # Dynamic micro-batching: concurrent clips of up to 30 seconds are collected for
+    # WHISPER_BATCH_WAIT_MS (or until WHISPER_BATCH_MAX_SIZE) and decoded together
+    WHISPER_BATCHING = True
+    WHISPER_BATCH_MAX_SIZE = 8
+    WHISPER_BATCH_WAIT_MS = 10
+
+    # Admission control for inference: INFERENCE_CONCURRENCY requests run at once (keep it at
+    # least WHISPER_BATCH_MAX_SIZE so batches can fill), up to INFERENCE_QUEUE_DEPTH wait at
+    # most INFERENCE_MAX_WAIT_SECONDS, the rest get 429 with Retry-After
+    INFERENCE_CONCURRENCY = 8
+    INFERENCE_QUEUE_DEPTH = 16
+    INFERENCE_MAX_WAIT_SECONDS = 3.0
+    # /transcribe/batch runs at most TRANSCRIBE_BATCH_CONCURRENCY clips at once, well below
+    # INFERENCE_CONCURRENCY so live calls keep most slots. A clip rejected by admission is
+    # retried after Retry-After up to TRANSCRIBE_BATCH_MAX_RETRIES times, then reported as failed.
+    TRANSCRIBE_BATCH_CONCURRENCY = 2
+    TRANSCRIBE_BATCH_MAX_RETRIES = 10
+
+    # Startup warmup: every (model, decoding profile, prompt) combination the routing tables can
+    # produce on the first clip length, plus each (model, profile)'s longest prompt on the
+    # remaining lengths (the test file is looped or cut to fit)
+    WARMUP = True
+    WARMUP_CLIP_SECONDS = (1.0, 3.0, 5.0)
+
+    # Decode uploads in memory instead of writing them to a NamedTemporaryFile first
+    IN_MEMORY_DECODE = True
+    # Sample rate assumed for raw mulaw / pcm_s16le uploads that do not declare one
+    RAW_SAMPLE_RATE = 8000
+
+    # Trim leading and trailing audio quieter than TRIM_ENERGY_DB before decoding,
+    # keeping TRIM_PADDING_MS around the speech
+    TRIM_SILENCE = True
+    TRIM_ENERGY_DB = -45.0
+    TRIM_PADDING_MS = 200
+
+    # Energy / zero-crossing speech gate: clips without enough voiced frames are labeled
+    # "silent" without running Whisper
+    SPEECH_GATE = True
+    SPEECH_GATE_ENERGY_DB = -45.0
+    SPEECH_GATE_MIN_SPEECH_MS = 150
+
+    # Decoding profiles passed to Whisper. "accurate" matches the historical settings.
+    DECODING_PROFILES = {
+        "accurate": {
+            "beam_size": 5,
+            "best_of": 5,
+            "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+            "without_timestamps": False,
+            "condition_on_previous_text": True,
+        },
+        "fast": {
+            "beam_size": 2,
+            "best_of": 2,
+            "temperature": [0.0, 0.4],
+            "without_timestamps": True,
+            "condition_on_previous_text": False,
+        },
+        "greedy": {
+            "beam_size": 1,
+            "best_of": 1,
+            "temperature": [0.0],
+            "without_timestamps": True,
+            "condition_on_previous_text": False,
+        },
+    }
+    DEFAULT_DECODING_PROFILE = "accurate"
+    # (call_type, turn_number) -> profile name, "*" matches any call type or turn
+    DECODING_PROFILE_TABLE = {
+        ("*", 1): "fast",
+    }
+    # Clips no longer than SHORT_CLIP_SECONDS use SHORT_CLIP_PROFILE whatever the turn
+    ADAPTIVE_DECODING = True
+    SHORT_CLIP_SECONDS = 1.5
+    SHORT_CLIP_PROFILE = "greedy"
+
+    # Longest window of (trimmed) audio decoded per (call_type, turn_number), "*" matches any
+    # call type or turn. Audio past the window is dropped and reported as clipped_seconds.
+    CLIP_WINDOW_SECONDS = {
+        ("*", 1): 6.0,
+        ("medicare", 4): 8.0,
+    }
+
+    # Early stop: decode segment by segment and stop once the substring/exact rules give one
+    # of EARLY_STOP_LABELS (after call type remapping). Opt-in per request with early_stop=true.
+    # Segments need timestamps, so early stop decodes with timestamps whatever the profile says.
+    EARLY_STOP = False
+    EARLY_STOP_LABELS = ("AM", "LB", "AP", "ABN", "NQA")
+
+    # WebSocket streaming: a partial result over the last STREAM_WINDOW_SECONDS of audio is
+    # pushed every STREAM_STEP_SECONDS of newly received audio
+    STREAM_WINDOW_SECONDS = 10.0
+    STREAM_STEP_SECONDS = 1.0
+
+    # Encoder outputs of recent single-window clips, so retries, temperature fallback and
+    # prompt comparisons only rerun the decoder. Roughly 4.5 MB per entry for small.en.
+    ENCODER_CACHE = True
+    ENCODER_CACHE_MAX_ENTRIES = 32
+    ENCODER_CACHE_TTL_SECONDS = 120
+
+    # DistilBERT micro-batching: concurrent /classify/ calls for the same model are collected
+    # for CLASSIFICATION_BATCH_WAIT_MS (or until CLASSIFICATION_BATCH_MAX_SIZE) and run as
+    # one padded batch
+    CLASSIFICATION_BATCHING = True
+    CLASSIFICATION_BATCH_MAX_SIZE = 32
+    CLASSIFICATION_BATCH_WAIT_MS = 5
+
+    # Classification models load on first use. With CLASSIFIER_MEMORY_BUDGET_MB set, the least
+    # recently used ones are evicted once their parameters exceed it; reloading takes 1-3 s on
+    # the request path, so keep it above what the models in CLASSIFIER_TABLE need together
+    # (about 1.8 GB for the seven DistilBERT checkpoints). None keeps every loaded model.
+    # CLASSIFIER_PRELOAD lists the (call_type, model_type) pairs loaded at startup.
+    CLASSIFIER_MEMORY_BUDGET_MB = None
+    CLASSIFIER_PRELOAD = (("medicare", "A"),)
+    # Models listed in CLASSIFIER_HEAD_ONLY_MODELS were fine-tuned head-only from
+    # CLASSIFIER_BACKBONE, so only their pre_classifier/classifier layers are loaded and run on
+    # one shared encoder. /classify/shadow runs every model's head on that encoder at once.
+    CLASSIFIER_BACKBONE = "distilbert-base-uncased"
+    CLASSIFIER_HEAD_ONLY_MODELS = ()
+    # Inference backend per classification model name, "torch" (default), "onnx" or "int8". ONNX
+    # models are exported once to ONNX_CACHE_DIR and run by ONNX Runtime on the CPU; one whose
+    # logits differ from PyTorch by more than ONNX_PARITY_TOLERANCE keeps the PyTorch path.
+    # int8 models are dynamically quantized PyTorch models, CPU only; compare them with
+    # python -m voiceflow_ai.quantization_report before switching a model over.
+    CLASSIFIER_BACKENDS = {}
+    ONNX_CACHE_DIR = os.environ.get("VOICEFLOW_ONNX_CACHE_DIR", "/var/cache/voiceflow/onnx")
+    ONNX_OPSET = 14
+    ONNX_INTRA_OP_THREADS = 0  # 0 lets ONNX Runtime use one thread per physical core
+    ONNX_PARITY_CHECK = True
+    ONNX_PARITY_TOLERANCE = 1e-3
+
+    # Content-addressed cache of /transcribe/ results, keyed by the decoded PCM plus the
+    # prompt, decoding profile and turn parameters
+    RESULT_CACHE = True
+    RESULT_CACHE_MAX_ENTRIES = 2048
+    RESULT_CACHE_TTL_SECONDS = 600
 
     EXACT_SEARCH_DICT = {
         "HP": [
@@ -0,0 +1,79 @@
+import zlib
+
+from voiceflow_ai.core.config import settings as c
+
+# Same fallback thresholds as faster-whisper's transcribe defaults
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOG_PROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def lookup_turn(table, call_type, turn_number):
+    """Value for (call_type, turn_number) in a table where "*" matches any call type or turn."""
+    for key in ((call_type, turn_number), (call_type, "*"), ("*", turn_number)):
+        if key in table:
+            return table[key]
+    return None
+
+
+def select_profile(call_type, turn_number, duration=None):
+    """Return (name, profile) for a turn, preferring a cheap profile for short clips."""
+    if c.ADAPTIVE_DECODING and duration is not None and duration <= c.SHORT_CLIP_SECONDS:
+        name = c.SHORT_CLIP_PROFILE
+    else:
+        name = lookup_turn(c.DECODING_PROFILE_TABLE, call_type, turn_number) or c.DEFAULT_DECODING_PROFILE
+    return name, c.DECODING_PROFILES[name]
+
+
+def clip_window(call_type, turn_number):
+    """Longest audio window in seconds decoded for a turn, or None for the whole clip."""
+    return lookup_turn(c.CLIP_WINDOW_SECONDS, call_type, turn_number)
+
+
+def transcribe_options(profile):
+    """Keyword arguments for WhisperModel.transcribe."""
+    return {
+        "beam_size": profile["beam_size"],
+        "best_of": profile["best_of"],
+        "temperature": profile["temperature"],
+        "without_timestamps": profile["without_timestamps"],
+        "condition_on_previous_text": profile["condition_on_previous_text"],
+    }
+
+
+def generate_options(profile, temperature=0.0):
+    """Keyword arguments for CTranslate2 Whisper.generate at one of the profile's temperatures.
+
+    Same as faster-whisper: beam search at temperature 0, otherwise ``best_of`` samples.
+    """
+    if temperature > 0:
+        return {
+            "beam_size": 1,
+            "num_hypotheses": profile["best_of"],
+            "sampling_topk": 0,
+            "sampling_temperature": temperature,
+        }
+    return {"beam_size": profile["beam_size"]}
+
+
+def avg_logprob(tokens, score):
+    """faster-whisper's average log probability from CTranslate2's length-normalized score."""
+    return score * len(tokens) / (len(tokens) + 1)
+
+
+def is_no_speech(tokens, score, no_speech_prob):
+    """Whether faster-whisper would drop a decode result as silence."""
+    return no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob(tokens, score) < LOG_PROB_THRESHOLD
+
+
+def needs_fallback(text, tokens, score, no_speech_prob=0.0):
+    """Whether a decode result fails faster-whisper's compression ratio or log prob checks.
+
+    Like faster-whisper, a result judged to be silence is not retried at higher temperatures.
+    """
+    text_bytes = text.encode("utf-8")
+    if text_bytes and len(text_bytes) / len(zlib.compress(text_bytes)) > COMPRESSION_RATIO_THRESHOLD:
+        return True
+    if is_no_speech(tokens, score, no_speech_prob):
+        return False
+    return avg_logprob(tokens, score) < LOG_PROB_THRESHOLD
@@ -1,13 +1,26 @@
-from voiceflow_ai.services.transcription_service import TranscriptionService
-from voiceflow_ai.services.classification_service import ClassificationService
+from voiceflow_ai.core.config import settings as c
 
-transcription_service = TranscriptionService()
-classification_service = ClassificationService()
+# Created on first use, so each app only imports the service it runs: a remote transcription
+# front end never loads torch, CTranslate2 or faster-whisper
+_services = {}
 
 
 def get_transcription_service():
-    return transcription_service
+    if "transcription" not in _services:
+        if c.TRANSCRIPTION_MODE == "remote":
+            from voiceflow_ai.services.remote_transcription_service import RemoteTranscriptionService
+
+            _services["transcription"] = RemoteTranscriptionService()
+        else:
+            from voiceflow_ai.services.transcription_service import TranscriptionService
+
+            _services["transcription"] = TranscriptionService()
+    return _services["transcription"]
 
 
 def get_classification_service():
-    return classification_service
+    if "classification" not in _services:
+        from voiceflow_ai.services.classification_service import ClassificationService
+
+        _services["classification"] = ClassificationService()
+    return _services["classification"]
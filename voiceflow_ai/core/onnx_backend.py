@@ -0,0 +1,112 @@
+import hashlib
+import os
+
+import torch
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.logger import get_logger
+
+logger = get_logger("onnx_backend")
+
+# Utterances the ONNX logits are compared on against PyTorch before a model is served
+PARITY_TEXTS = (
+    "hello",
+    "yes i am still interested can you tell me more about the plan",
+    "please take me off your list and do not call this number again",
+)
+
+
+class OnnxModel:
+    """An ONNX Runtime session called like a transformers sequence classifier."""
+
+    def __init__(self, path, session):
+        self.path = path
+        self.session = session
+        self.input_names = [model_input.name for model_input in session.get_inputs()]
+
+    def __call__(self, input_ids=None, attention_mask=None, **kwargs):
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        feeds = {name: feeds[name].cpu().numpy() for name in self.input_names}
+        [logits] = self.session.run(["logits"], feeds)
+        return SequenceClassifierOutput(logits=torch.from_numpy(logits))
+
+    def size_bytes(self):
+        return os.path.getsize(self.path)
+
+
+def export_path(name, checkpoint):
+    """Where the export of a model is cached, a new file whenever the checkpoint changes."""
+    modified = os.path.getmtime(checkpoint) if os.path.exists(checkpoint) else None
+    key = (name, checkpoint, modified, torch.__version__)
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8)
+    return os.path.join(c.ONNX_CACHE_DIR, f"{name}-{digest.hexdigest()}.onnx")
+
+
+def export(model, tokenizer, path):
+    """Export a sequence classifier with dynamic batch and sequence axes."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    inputs = tokenizer(list(PARITY_TEXTS[:2]), return_tensors="pt", padding=True)
+    device = next(model.parameters()).device
+    partial_path = f"{path}.{os.getpid()}.partial"
+    torch.onnx.export(
+        model,
+        (inputs["input_ids"].to(device), inputs["attention_mask"].to(device)),
+        partial_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=c.ONNX_OPSET,
+    )
+    # Replicas sharing the cache directory never see a half-written file
+    os.replace(partial_path, path)
+
+
+def load_session(path):
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = c.ONNX_INTRA_OP_THREADS
+    # Batches of one model run one at a time, parallelism comes from the intra-op threads
+    options.inter_op_num_threads = 1
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+
+def parity(torch_model, onnx_model, tokenizer, texts=PARITY_TEXTS):
+    """Largest absolute difference between the PyTorch and ONNX logits on ``texts``."""
+    inputs = tokenizer(list(texts), return_tensors="pt", padding=True, truncation=True, max_length=512)
+    device = next(torch_model.parameters()).device
+    with torch.no_grad():
+        expected = torch_model(**inputs.to(device)).logits.cpu()
+    actual = onnx_model(**inputs).logits
+    return (expected - actual).abs().max().item()
+
+
+def to_onnx(name, checkpoint, model, tokenizer):
+    """Serve ``model`` through ONNX Runtime, exporting it on first use.
+
+    Falls back to the PyTorch model when the export or the session fails, onnxruntime is not
+    installed, or its logits differ by more than ONNX_PARITY_TOLERANCE.
+    """
+    path = export_path(name, checkpoint)
+    try:
+        if not os.path.exists(path):
+            logger.info(f"Exporting classification model {name} to {path}")
+            export(model, tokenizer, path)
+        onnx_model = OnnxModel(path, load_session(path))
+    except Exception as e:
+        logger.error(f"Could not serve {name} with ONNX Runtime, serving it with PyTorch: {e}", exc_info=True)
+        return model
+    if c.ONNX_PARITY_CHECK:
+        difference = parity(model, onnx_model, tokenizer)
+        if difference > c.ONNX_PARITY_TOLERANCE:
+            logger.error(f"ONNX logits of {name} differ from PyTorch by {difference:.2e}, serving it with PyTorch")
+            return model
+        logger.info(f"ONNX logits of {name} match PyTorch within {difference:.2e}")
+    return onnx_model
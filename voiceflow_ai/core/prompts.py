@@ -0,0 +1,174 @@
+import collections
+
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.logger import get_logger
+
+logger = get_logger("prompts")
+
+Prompt = collections.namedtuple("Prompt", ["name", "text", "tokens"])
+
+# Any value in a PROMPT_TABLE key position
+ANY = "*"
+
+PROMPTS = {
+    "age_medicare": (
+        "fifty-one, fifty-two, fifty-three, fifty-four, fifty-five, fifty-six, "
+        "fifty-seven, fifty-eight, fifty-nine, sixty, sixty-one, sixty-two, sixty-three, "
+        "sixty-four, sixty-five, sixty-six, sixty-seven, sixty-eight, sixty-nine, "
+        "seventy, seventy-one, seventy-two, seventy-three, seventy-four, seventy-five, "
+        "seventy-six, seventy-seven, seventy-eight, seventy-nine, eighty, eighty-one, "
+        "eighty-two, eighty-three, eighty-four, eighty-five, eighty-six, eighty-seven, "
+        "eighty-eight, eighty-nine, ninety, ninety-one, ninety-two, ninety-three, "
+        "ninety-four, ninety-five, ninety-six, ninety-seven, ninety-eight, ninety-nine, "
+        "one hundred, one hundred and one, one hundred and two, one hundred and three, "
+        "one hundred and four, one hundred and five, one hundred and six, "
+        "one hundred and seven, one hundred and eight, one hundred and nine, "
+        "one hundred and ten"
+    ),
+    "income_aca": (
+        "Yes, no, I do, I don't, yes I do, no I don't, sure, I'm sure, yeah, nah, absolutely, of course, "
+        "true, false, it is, it's, more, more than, less, less than, none, sir, ma'am, higher, lower, "
+        "employed, unemployed, making, nothing, I make more, I make less, how, what, who, how much, say, "
+        "I don't know, interested, call, list, hang up, recording, recorded, transfer, invalid, business, "
+        "10000, 12000, 13000, 15000, 20000, 25000, 30000, 35000, 40000, 43000, 50000, 55000, 60000, 80000, "
+        "90000, 100000, 120000, 150000, 200000, 1000, 1500, 2000, 3000, 150, 200, 350, dollars, a year, a month, "
+        "a week, an hour, income"
+    ),
+    "age": (
+        "fifty-one, fifty-two, fifty-three, fifty-four, fifty-five, fifty-six, "
+        "fifty-seven, fifty-eight, fifty-nine, sixty, sixty-one, sixty-two, sixty-three, "
+        "sixty-four, sixty-five, sixty-six, sixty-seven, sixty-eight, sixty-nine, "
+        "seventy, seventy-one, seventy-two, seventy-three, seventy-four, seventy-five,"
+        "seventy-six, seventy-seven, seventy-eight, seventy-nine, eighty, eighty-one, "
+        "eighty-two, eighty-three, eighty-four, eighty-five, eighty-six, eighty-seven, "
+        "eighty-eight, eighty-nine, ninety, ninety-one, "
+        "yes, no, I am, years, old, under, over, age, born, "
+        "twenty, twenty-four, twenty-nine, thirty, thirty-five, thirty-nine,"
+        "forty, forty-seven, forty-one, nineteen, forty-two"
+    ),
+    "small_talk": (
+        "calling, want, need, what, hello, yes, no, sure, nah, not,"
+        "connect,for, you, fine, how about you, I'm fine,"
+        "yes sir, I'm, doing, alright, call, cannot, about, where, help, too, doing good, this, "
+        "not, good, how, english, spanish, speak, I, may, hi, "
+        "busy, moment, right, calling, help, pretty, yup, you, at, work, right now, "
+        "I don't, I do, who, who's, quit, do, don't, what, and, just fine, and you, "
+        "yeah, go ahead, help, going, can, I'm doing fine, I'm good, about"
+    ),
+    "qualify_fe": (
+        "yes, yeah, no, I do, I don't, absolutely, absolutely not, no I don't, sure, correct, "
+        "incorrect, right, not, have, I have, do, don't, do what, interested, not interested, busy, "
+        "stop, quit, take, take me, calling, call, remove, list, calling list, please, again, have "
+        "what, any what, need, want, employed, employment, coverage, covered, old, retired, subsidy, "
+        "qualified, eligible, not eligible, guess, I guess, through, is through, my insurance, "
+        "entitlement, decisions, decide, final expense, burial, funeral, military, veteran, a veteran, "
+        "social security, plan, card, work, back, say, say what, what, what now, why, who, "
+        "Do I have, alright, nah, yes sir, no sir, english, spanish"
+    ),
+    "qualify_aca": (
+        "yes, yeah, no, I do, I don't, absolutely, absolutely not, no I don't, sure, correct, incorrect, right, not, "
+        "have, I have, do, don't, do what, interested, not interested, busy, stop, quit, take, take me, calling, call, "
+        "remove, list, calling list, please, again, have what, any what, need, want, employed, employment, coverage, covered, "
+        "old, retired, subsidy, qualified, eligible, not eligible, guess, I guess, through, is through, my insurance, entitlement, "
+        "not entitled, citizen, healthcare, insurance, insured, ACA, affordable care act, blue cross, blue shield, ambetter, "
+        "aetna, humana, oscar, united, united health, Medicare, have medicare, Medicaid, have medicaid, tricare, VA, the VA, "
+        "military, veteran, a veteran, social security, plan, card, work, back, say, say what, what, what now, why, who, "
+        "Do I have, alright, nah, yes sir, no sir, english, spanish"
+    ),
+    "greeting_medicare": (
+        "what, okay, go ahead, speak, do you, need, hello, yes, yeah, call, who's calling, hi, "
+        "hey, this, want, why, calling, leave, message, not available, sorry,thank you, bye"
+    ),
+    "greeting": (
+        "what, okay, go ahead, speak, do you, need, hello, yes, yeah, call, who's calling, hi, "
+        "hey, this, want, why, calling, leave, message, not available, sorry"
+    ),
+    "general_medicare": (
+        "calling, want, need, what, tricare, minute, hello, yes, no, sure, nah, correct, "
+        "connect, incorrect, military, both, interested, not interested, retired, "
+        "medicare, Medicaid, humana, above, over, yes sir, senior alright, part A, card, "
+        "part B, part C, A, B, C, D, V-A, A and B, and C, ABC and D, AB and C, E, not, "
+        "entitled, busy, moment, eyes, hearing, dental, advantage, not entitled, right, "
+        "absolutely, need, mate, united, invited, whole, social security, I don't, I do, "
+        "call, vision, medication, yeah, guess, cover, I guess, go ahead"
+    ),
+    "general_aca": (
+        "calling, want, need, what, tricare, minute, hello, yes, no, sure, nah, correct, "
+        "connect, incorrect, military, both, interested, not interested, retired, insurance, "
+        "medicare, employment, Medicaid, humana, above, over, yes sir, senior, I am, alright, card, "
+        "ACA, aetna, humana, united, M-better, less, more, annual, income, not, "
+        "entitled, busy, moment, eyes, hearing, dental, advantage, not entitled, right, "
+        "absolutely, need, mate, united, invited, whole, social security, I don't, I do, "
+        "call, vision, medication, yeah, guess, cover, I guess, go ahead, V-A, employed"
+    ),
+    "glossary": (
+        "Glossary: new service, customer support, prices, packages, subscription, "
+        "phone, cable, internet, help, TV, mobile, bill, router, wires, hello, hi, "
+        "sign up, signing up, billed, customer, cost, wi-fi, wifi, apartment, xfinity, "
+        "comcast, AT&T, optimum, spectrum, viacast, verizon, t-mobile, "
+        "cox communication, address, moving, deals, transfer, house, line, agent, "
+        "hang up, hung up, dropped, hanged, screen, program, cancelled, pricing, home, "
+        "restart, area, set up, hooked, old, account, looking, questions, calling, "
+        "transferred, hook up, different, quote, how much, information, contract, "
+        "contact, turned off, on, disabled, qualify, the service, move the service, "
+        "support, Ima, suspend, disconnect, disconnected"
+    ),
+}
+
+# (turn_number, call_type, model_type) -> prompt name. Lookup tries the exact key first,
+# then any model_type for the turn, then any turn for the call type.
+PROMPT_TABLE = {
+    (4, "medicare", ANY): "age_medicare",
+    (6, "aca", "A"): "income_aca",
+    (5, "aca", "A"): "age",
+    (4, "aca", "B"): "age",
+    (3, "fe", ANY): "age",
+    (2, "aca", ANY): "small_talk",
+    (2, "fe", ANY): "small_talk",
+    (2, "medicare", "B"): "small_talk",
+    (4, "fe", ANY): "qualify_fe",
+    (3, "aca", "A"): "qualify_aca",
+    (4, "aca", "A"): "qualify_aca",
+    (3, "aca", "B"): "qualify_aca",
+    (5, "aca", "B"): "qualify_aca",
+    (1, "medicare", ANY): "greeting_medicare",
+    (1, "aca", ANY): "greeting",
+    (1, "fe", ANY): "greeting",
+    (ANY, "medicare", ANY): "general_medicare",
+    (ANY, "aca", ANY): "general_aca",
+}
+
+
+class PromptRegistry:
+    """Prompt table built once at startup, with each prompt's tokenization cached."""
+
+    def __init__(self, prompts=None, table=None):
+        prompts = PROMPTS if prompts is None else prompts
+        self.table = PROMPT_TABLE if table is None else table
+        self.prompts = {name: Prompt(name, text, None) for name, text in prompts.items()}
+
+    def load(self, tokenizer):
+        """Tokenize every prompt the way faster-whisper would for a string initial_prompt."""
+        self.prompts = {
+            name: Prompt(name, prompt.text, tokenizer.encode(" " + prompt.text.strip()))
+            for name, prompt in self.prompts.items()
+        }
+        logger.info(f"Prompt registry loaded, token lengths: {self.token_lengths()}")
+
+    def lookup(self, call_type, model_type, turn_number):
+        if not c.TYPE:
+            return self.prompts["glossary"]
+        for key in (
+            (turn_number, call_type, model_type),
+            (turn_number, call_type, ANY),
+            (ANY, call_type, ANY),
+        ):
+            if key in self.table:
+                return self.prompts[self.table[key]]
+        return None
+
+    def token_lengths(self):
+        return {
+            name: len(prompt.tokens) if prompt.tokens is not None else None
+            for name, prompt in self.prompts.items()
+        }
@@ -7,9 +7,145 @@ import requests
 
 from voiceflow_ai.core.config import settings as c
 from voiceflow_ai.core.logger import get_logger
+from voiceflow_ai.core.metrics import STAGE_SECONDS
 
 logger = get_logger("transcription_processor")
 
+REMOVAL_LIST = [
+    "background noise drowns out speaker",
+    "drowned out by background noise",
+    "knocking on the door",
+    "knocking on door",
+    "muffled radio static",
+    "audio fades out",
+    "soft piano music",
+    "indistinct radio chatter",
+    "sad trombone music",
+    "audio cuts out",
+    "soft music",
+    "door opens",
+    "upbeat music",
+    "light music",
+    "radio static",
+    "static crackling",
+    "audience applauds",
+    "piano music",
+    "electronic beeping",
+    "ominous music",
+    "keyboard clicking",
+    "muffled speaking",
+    "muffled speech",
+    "dramatic music",
+    "muffled talking",
+    "audience applauding",
+    "audience laughs",
+    "dog barking",
+    "dogs barking",
+    "gentle music",
+    "electronic music",
+    "gun fires",
+    "non-english speech",
+    "air whooshing",
+    "phone buzzes",
+    "audience claps",
+    "engine revving",
+    "swoosh sound",
+    "indistinct chatter",
+    "fart noise",
+    "clock ticking",
+    "electronic jingle",
+    "drum roll",
+    "gavel bangs",
+    "garbled speech",
+    "electronic noise",
+    "birds chirping",
+    "thunder rumbling",
+    "wind howling",
+    "crowd cheering",
+    "crowd chattering",
+    "camera clicks",
+    "kissing sound",
+    "door slams",
+    "bell dings",
+    "audio out",
+    "phone vibrating",
+    "water gurgling",
+    "baby babbling",
+    "car horn",
+    "keyboard clacking",
+    "radio chatter",
+    "muffled voices",
+    "electronic sounds",
+    "door slamming",
+    "phone ringing",
+    "audience laughing",
+    "dog barks",
+    "baby crying",
+    "sirens blaring",
+    "cat meows",
+    "clears throat",
+    "audience clapping",
+    "whooshing",
+    "static",
+    "inaudible",
+    "mumbling",
+    "chuckling",
+    "phone rings",
+    "gunfire",
+    "growls",
+    "farting",
+    "barking",
+    "chuckles",
+    "thud",
+    "groaning",
+    "growl",
+    "music",
+    "Coughing",
+    "banging",
+    "boop",
+    "indiscernible",
+    "sighs",
+    "sigh",
+    "sings",
+    "coughs",
+    "knocking",
+    "pause",
+    "cheering",
+    "whistling",
+    "kiss",
+    "thumping",
+    "growling",
+    "gunshot",
+    "gunshots",
+    "applause",
+    "buzzer",
+    "mumbles",
+    "squeaking",
+    "popping",
+    "gunshots",
+    "clicking",
+    "claps",
+    "silence",
+    "silentclapping",
+    "clap",
+    "laughs",
+    "laughing",
+    "singing",
+    "typing",
+    "beeping",
+    "groans",
+    "unintelligible",
+    "bangs",
+    "beep",
+    "crying",
+    "chuckles",
+    "swoosh",
+    "coughing",
+    "indistinct",
+    "explosion",
+    "blank_audio",
+]
+
 
 class TranscriptionProcessor:
     def __init__(self):
@@ -39,7 +175,7 @@ class TranscriptionProcessor:
 
         return transcribed_text
 
-    def process_transcription(self, transcribed_text, connection_id, model_type, call_type, turn):
+    def normalize_text(self, transcribed_text):
         # Convert to lowercase
         transcribed_text = transcribed_text.lower()
 
@@ -53,145 +189,47 @@ class TranscriptionProcessor:
             ch for ch in transcribed_text if ch not in punctuation.replace("-", "") or ch == "'"
         ).lower()
 
-        removal_list = [
-            "background noise drowns out speaker",
-            "drowned out by background noise",
-            "knocking on the door",
-            "knocking on door",
-            "muffled radio static",
-            "audio fades out",
-            "soft piano music",
-            "indistinct radio chatter",
-            "sad trombone music",
-            "audio cuts out",
-            "soft music",
-            "door opens",
-            "upbeat music",
-            "light music",
-            "radio static",
-            "static crackling",
-            "audience applauds",
-            "piano music",
-            "electronic beeping",
-            "ominous music",
-            "keyboard clicking",
-            "muffled speaking",
-            "muffled speech",
-            "dramatic music",
-            "muffled talking",
-            "audience applauding",
-            "audience laughs",
-            "dog barking",
-            "dogs barking",
-            "gentle music",
-            "electronic music",
-            "gun fires",
-            "non-english speech",
-            "air whooshing",
-            "phone buzzes",
-            "audience claps",
-            "engine revving",
-            "swoosh sound",
-            "indistinct chatter",
-            "fart noise",
-            "clock ticking",
-            "electronic jingle",
-            "drum roll",
-            "gavel bangs",
-            "garbled speech",
-            "electronic noise",
-            "birds chirping",
-            "thunder rumbling",
-            "wind howling",
-            "crowd cheering",
-            "crowd chattering",
-            "camera clicks",
-            "kissing sound",
-            "door slams",
-            "bell dings",
-            "audio out",
-            "phone vibrating",
-            "water gurgling",
-            "baby babbling",
-            "car horn",
-            "keyboard clacking",
-            "radio chatter",
-            "muffled voices",
-            "electronic sounds",
-            "door slamming",
-            "phone ringing",
-            "audience laughing",
-            "dog barks",
-            "baby crying",
-            "sirens blaring",
-            "cat meows",
-            "clears throat",
-            "audience clapping",
-            "whooshing",
-            "static",
-            "inaudible",
-            "mumbling",
-            "chuckling",
-            "phone rings",
-            "gunfire",
-            "growls",
-            "farting",
-            "barking",
-            "chuckles",
-            "thud",
-            "groaning",
-            "growl",
-            "music",
-            "Coughing",
-            "banging",
-            "boop",
-            "indiscernible",
-            "sighs",
-            "sigh",
-            "sings",
-            "coughs",
-            "knocking",
-            "pause",
-            "cheering",
-            "whistling",
-            "kiss",
-            "thumping",
-            "growling",
-            "gunshot",
-            "gunshots",
-            "applause",
-            "buzzer",
-            "mumbles",
-            "squeaking",
-            "popping",
-            "gunshots",
-            "clicking",
-            "claps",
-            "silence",
-            "silentclapping",
-            "clap",
-            "laughs",
-            "laughing",
-            "singing",
-            "typing",
-            "beeping",
-            "groans",
-            "unintelligible",
-            "bangs",
-            "beep",
-            "crying",
-            "chuckles",
-            "swoosh",
-            "coughing",
-            "indistinct",
-            "explosion",
-            "blank_audio",
-        ]
-
         # Remove certain words and strings
-        for word in removal_list:
+        for word in REMOVAL_LIST:
             transcribed_text = transcribed_text.replace(word, "")
 
+        return transcribed_text
+
+    def match_rules(self, transcribed_text, call_type):
+        """Label text with the substring/exact rules only, without the remote classifier."""
+        transcribed_text = self.normalize_text(transcribed_text)
+        if not transcribed_text.strip():
+            return None
+        transcribed_text = re.sub(" +", " ", transcribed_text.strip())
+        label, _, _ = self.substring_search(transcribed_text)
+        if label is None:
+            label, _, _ = self.exact_search(transcribed_text)
+        return self.remap_label(label, call_type)
+
+    def early_stop_label(self, transcribed_text, call_type):
+        """The rule label for text decoded so far if it settles the turn, else None."""
+        label = self.match_rules(transcribed_text, call_type) if transcribed_text else None
+        return label if label in c.EARLY_STOP_LABELS else None
+
+    @staticmethod
+    def remap_label(label, call_type):
+        if label == "APM" and call_type == "aca":
+            label = "NQA"
+        if label == "APA" and call_type == "medicare":
+            label = "ABN"
+        if label == "APA" or label == "APM":
+            label = "AP"
+        return label
+
+    def label_transcription(self, transcribed_text, transcription_info, connection_id, model_type, call_type, turn):
+        """Label a transcription, or mark it silent when the speech gate kept the audio from Whisper."""
+        if transcription_info.get("speech_gate", {}).get("speech") is False:
+            return "silent", 1.2, "", "VAD"
+        return self.process_transcription(transcribed_text, connection_id, model_type, call_type, turn)
+
+    def process_transcription(self, transcribed_text, connection_id, model_type, call_type, turn):
+        transcribed_text = self.normalize_text(transcribed_text)
+
         # Check if transcription is empty
         if not transcribed_text.strip():
             logger.error(
@@ -215,53 +253,43 @@ class TranscriptionProcessor:
                 return "N", 1.7, transcribed_text, "F"
         model_used = "SS"
         exact_search = False
-        label, confidence, substring_search = self.substring_search(transcribed_text)
-        if label == "APM" and call_type == "aca":
-            label = "NQA"
-        if label == "APA" and call_type == "medicare":
-            label = "ABN"
-        if label == "APA" or label == "APM":
-            label = "AP"
-        if label is None:
-            model_used = "ES"
-            label, confidence, exact_search = self.exact_search(transcribed_text)
-            if label == "APM" and call_type == "aca":
-                label = "NQA"
-            if label == "APA" and call_type == "medicare":
-                label = "ABN"
-            if label == "APA" or label == "APM":
-                label = "AP"
-
+        with STAGE_SECONDS.time(stage="rule_search"):
+            label, confidence, substring_search = self.substring_search(transcribed_text)
+            label = self.remap_label(label, call_type)
             if label is None:
-                # Send the transcribed text to the classification service
-                for i in range(3):  # Retry up to 3 times
-                    try:
-                        data = {
-                            "transcribed_text": transcribed_text,
-                            "serial_number": connection_id,
-                            "model_type": model_type,
-                            "call_type": call_type,
-                        }
-                        response = requests.post(
-                            "http://voiceflow_classification:9000/classify/", data=data
-                        )
-                        response.raise_for_status()
-                        response = response.json()
-                        label = response.get("label")
-                        confidence = response.get("confidence")
-                        model_used = response.get("model_used")
-                        break
-                    except requests.RequestException:
-                        time.sleep(0.3 * i)  # Exponential backoff
-                    except Exception as e:
-                        logger.error(
-                            f"Error during classification request: {e}",
-                            extra={"serial_number": connection_id},
-                        )
-                else:
-                    model_used = "CE"
-                    label = "N"
-                    confidence = 1.1
+                model_used = "ES"
+                label, confidence, exact_search = self.exact_search(transcribed_text)
+                label = self.remap_label(label, call_type)
+
+        if label is None:
+            # Send the transcribed text to the classification service
+            for i in range(3):  # Retry up to 3 times
+                try:
+                    data = {
+                        "transcribed_text": transcribed_text,
+                        "serial_number": connection_id,
+                        "model_type": model_type,
+                        "call_type": call_type,
+                    }
+                    with STAGE_SECONDS.time(stage="remote_classify"):
+                        response = requests.post(c.CLASSIFICATION_URL, data=data)
+                    response.raise_for_status()
+                    response = response.json()
+                    label = response.get("label")
+                    confidence = response.get("confidence")
+                    model_used = response.get("model_used")
+                    break
+                except requests.RequestException:
+                    time.sleep(0.3 * i)  # Exponential backoff
+                except Exception as e:
+                    logger.error(
+                        f"Error during classification request: {e}",
+                        extra={"serial_number": connection_id},
+                    )
+            else:
+                model_used = "CE"
+                label = "N"
+                confidence = 1.1
         logger.debug(
             f"label is: {label} and confidence is: {confidence} and exact search is: {exact_search} and "
             f"substring search is: {substring_search}",
@@ -0,0 +1,129 @@
+"""Node-local Whisper model server.
+
+One process per node owns the WhisperModel and its micro-batchers. Transcription front ends
+started with VOICEFLOW_TRANSCRIPTION_MODE=remote forward decoded audio to it over
+MODEL_SERVER_ADDRESS, so requests from every front end on the node share one copy of the
+model, one set of CPU threads and the same batches.
+
+    python -m voiceflow_ai.model_server
+    python -m voiceflow_ai.model_server --ping    # health check
+"""
+import argparse
+import os
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.logger import get_logger
+from voiceflow_ai.services.remote_transcription_service import (
+    RemoteTranscriptionService, check_authkey, model_server_address,
+)
+from voiceflow_ai.services.transcription_service import TranscriptionService
+
+logger = get_logger("model_server")
+
+
+class ModelServer:
+    """Serve TranscriptionService calls, one thread per front-end connection."""
+
+    def __init__(self, service, address=None, authkey=None):
+        self.service = service
+        self.address = model_server_address(address)
+        self.authkey = authkey or c.MODEL_SERVER_AUTHKEY
+        check_authkey(self.address, self.authkey)
+
+    def handle(self, method, args, kwargs):
+        if method == "transcribe_audio":
+            return self.service.transcribe_audio(*args, **kwargs)
+        if method == "compare_prompts":
+            return self.service.compare_prompts(*args, **kwargs)
+        if method == "prompt_tokens":
+            return {name: prompt.tokens for name, prompt in self.service.prompt_registry.prompts.items()}
+        if method == "ping":
+            return {
+                "ready": self.service.ready,
+                "default_model": self.service.default_model,
+                "model_table": self.service.model_table,
+                "active_transcriptions": self.service.active_transcriptions_count,
+                "batch_queue_depth": {name: batcher.queue_depth for name, batcher in self.service.batchers.items()},
+            }
+        raise ValueError(f"Unknown model server method: {method}")
+
+    def serve_forever(self):
+        if isinstance(self.address, str):
+            os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+            if os.path.exists(self.address):
+                # Left behind by a previous run that did not exit cleanly
+                os.unlink(self.address)
+        # A new socket file is readable and writable by its owner and group only
+        umask = os.umask(0o117)
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        finally:
+            os.umask(umask)
+        with listener:
+            logger.info(f"Model server listening on {self.address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except (OSError, EOFError, AuthenticationError) as e:
+                    logger.warning(f"Rejected a model server connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    def _serve_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    method, args, kwargs = connection.recv()
+                except (OSError, EOFError):
+                    return
+                try:
+                    reply = ("ok", self.handle(method, args, kwargs))
+                except Exception as e:
+                    logger.error(f"Error while handling {method} in the model server: {e}")
+                    reply = ("error", str(e))
+                try:
+                    connection.send(reply)
+                except (OSError, EOFError):
+                    return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Whisper to the transcription front ends on this node.")
+    parser.add_argument("--address", default=None,
+                        help=f"Unix socket path or host:port, default {c.MODEL_SERVER_ADDRESS}")
+    parser.add_argument("--ping", action="store_true", help="Check that a running model server answers, then exit")
+    args = parser.parse_args(argv)
+
+    if args.ping:
+        try:
+            status = RemoteTranscriptionService(args.address)._call("ping")
+        except Exception as e:
+            logger.error(f"Model server is not answering: {e}")
+            return 1
+        return 0 if status["ready"] else 1
+
+    try:
+        server = ModelServer(None, args.address)
+    except ValueError as e:
+        # Checked before Whisper loads, so a misconfigured server fails in seconds
+        logger.error(str(e))
+        return 1
+    service = TranscriptionService()
+    if not service.initialize_model():
+        return 1
+    server.service = service
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for batcher in service.batchers.values():
+            batcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+"""fp32 vs int8 comparison of the DistilBERT classifiers on a labelled text set.
+
+Every line of the text set is a JSON object with ``text``, ``call_type`` and ``model_type``,
+plus an optional reference ``label``. Each line is classified by the model CLASSIFIER_TABLE
+picks for it, once with the fp32 checkpoint and once with its dynamically quantized int8 copy,
+on the CPU and one utterance at a time as in unbatched serving. Per model the report gives
+label agreement between the two, confidence drift, accuracy against the reference labels,
+p50/p95 latency and parameter memory.
+
+    python -m voiceflow_ai.quantization_report /data/labelled_texts.jsonl --threads 4
+"""
+import argparse
+import collections
+import json
+import time
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from voiceflow_ai.core.classifiers import CLASSIFIER_MODELS, ClassifierRegistry, model_size_bytes, quantize_int8
+from voiceflow_ai.core.logger import get_logger
+from voiceflow_ai.services.classification_service import ClassificationService
+
+logger = get_logger("quantization_report")
+
+
+def load_texts(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def classify(model, tokenizer, text, labels):
+    """Label, confidence and latency in seconds of one utterance."""
+    start = time.perf_counter()
+    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+    with torch.no_grad():
+        logits = model(**inputs).logits
+    probabilities = torch.nn.functional.softmax(logits, dim=1)
+    latency = time.perf_counter() - start
+    predicted_class = torch.argmax(probabilities, dim=1)[0]
+    label, confidence = ClassificationService.determine_label(predicted_class, probabilities, labels)
+    return label, confidence, latency
+
+
+def compare_model(name, items):
+    """Run (text, labels, reference label) items through the fp32 and int8 versions of a model."""
+    path = CLASSIFIER_MODELS[name]
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    fp32 = AutoModelForSequenceClassification.from_pretrained(path)
+    fp32.eval()
+    # quantize_dynamic copies the model, so both stay usable
+    int8 = quantize_int8(fp32)
+
+    results = {"fp32": [], "int8": []}
+    for variant, model in (("fp32", fp32), ("int8", int8)):
+        # The first call pays for lazy initialisation, keep it out of the latencies
+        classify(model, tokenizer, items[0][0], items[0][1])
+        for text, labels, _ in items:
+            results[variant].append(classify(model, tokenizer, text, labels))
+
+    def percentile(variant, q):
+        return float(np.percentile([latency for _, _, latency in results[variant]], q))
+
+    def accuracy(variant):
+        scored = [label == reference for (label, _, _), (_, _, reference) in zip(results[variant], items)
+                  if reference is not None]
+        return float(np.mean(scored)) if scored else None
+
+    drift = [abs(fp32_confidence - int8_confidence)
+             for (_, fp32_confidence, _), (_, int8_confidence, _) in zip(results["fp32"], results["int8"])]
+    return {
+        "model": name,
+        "texts": len(items),
+        "label_agreement": float(np.mean([
+            fp32_label == int8_label
+            for (fp32_label, _, _), (int8_label, _, _) in zip(results["fp32"], results["int8"])
+        ])),
+        "mean_confidence_drift": float(np.mean(drift)),
+        "max_confidence_drift": float(np.max(drift)),
+        "fp32_accuracy": accuracy("fp32"),
+        "int8_accuracy": accuracy("int8"),
+        "fp32_p50_seconds": percentile("fp32", 50),
+        "int8_p50_seconds": percentile("int8", 50),
+        "fp32_p95_seconds": percentile("fp32", 95),
+        "int8_p95_seconds": percentile("int8", 95),
+        "fp32_mb": model_size_bytes(fp32) / 2 ** 20,
+        "int8_mb": model_size_bytes(int8) / 2 ** 20,
+    }
+
+
+def run(texts, models=None):
+    registry = ClassifierRegistry()
+    by_model = collections.defaultdict(list)
+    for line, entry in enumerate(texts, 1):
+        classifier = registry.lookup(entry["call_type"], entry["model_type"])
+        if classifier is None or classifier.labels is None:
+            logger.warning(f"Line {line}: no labelled classifier for {entry['call_type']}/{entry['model_type']}")
+            continue
+        if models and classifier.model not in models:
+            continue
+        by_model[classifier.model].append((entry["text"], classifier.labels, entry.get("label")))
+
+    results = []
+    for name, items in sorted(by_model.items()):
+        logger.info(f"Comparing fp32 and int8 for {name} on {len(items)} texts")
+        results.append(compare_model(name, items))
+    return results
+
+
+def format_table(results):
+    columns = ["model", "texts", "label_agreement", "mean_confidence_drift", "max_confidence_drift",
+               "fp32_accuracy", "int8_accuracy", "fp32_p50_seconds", "int8_p50_seconds", "fp32_p95_seconds",
+               "int8_p95_seconds", "fp32_mb", "int8_mb"]
+    rows = [columns]
+    for result in results:
+        rows.append([
+            f"{result[column]:.4f}" if isinstance(result.get(column), float) else str(result.get(column))
+            for column in columns
+        ])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 DistilBERT classifiers on labelled texts.")
+    parser.add_argument("texts", help="JSONL of {text, call_type, model_type, label (optional)}")
+    parser.add_argument("--models", type=lambda value: [item for item in value.split(",") if item], default=None,
+                        help="Only these CLASSIFIER_MODELS names, default every model the texts use")
+    parser.add_argument("--threads", type=int, default=0, help="torch CPU threads, default torch's own")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    results = run(load_texts(args.texts), args.models)
+    print(format_table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,7 @@
 import asyncio
 import time
 from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Depends, Form
 
@@ -49,3 +50,30 @@ async def classify(classification_service: ClassificationService = Depends(get_c
         logger.error(f"An error occurred during transcription: {e}",
                      extra={"serial_number": connection_id})
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/classify/shadow")
+async def classify_shadow(classification_service: ClassificationService = Depends(get_classification_service),
+                          transcribed_text: str = Form(...), serial_number: str = Form(...),
+                          call_type: Optional[str] = Form(None)):
+    connection_id = serial_number
+    if classification_service.shutdown_in_progress:
+        raise HTTPException(status_code=503, detail="Server is shutting down. No new requests are being accepted.")
+
+    try:
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, classification_service.classify_all_heads,
+                                             transcribed_text, call_type)
+        logger.debug(f"Shadow classification of {len(results)} heads took {time.time() - start_time}",
+                     extra={"serial_number": connection_id})
+        return {"results": results}
+    except Exception as e:
+        logger.error(f"An error occurred during shadow classification: {e}",
+                     extra={"serial_number": connection_id})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/classifiers/stats")
+async def classifier_stats(classification_service: ClassificationService = Depends(get_classification_service)):
+    return classification_service.registry.stats()
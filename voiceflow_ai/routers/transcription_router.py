@@ -1,15 +1,27 @@
 import asyncio
+import functools
+import json
 import os
 import time
 from tempfile import NamedTemporaryFile
 
 import aiofiles
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+import numpy as np
+from typing import List, Optional
 
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from voiceflow_ai.core.admission import AdmissionRejected
+from voiceflow_ai.core.audio import (
+    RAW_ENCODINGS, SAMPLE_RATE, decode_audio_bytes, decode_raw, duration_seconds, resample,
+)
+from voiceflow_ai.core.config import settings as c
 from voiceflow_ai.core.logger import get_logger
+from voiceflow_ai.core.metrics import STAGE_SECONDS
 from voiceflow_ai.core.dependencies import get_transcription_service
 from voiceflow_ai.core.transcription_processor import TranscriptionProcessor
-from voiceflow_ai.services.transcription_service import TranscriptionService
+from voiceflow_ai.services.transcription_base import BaseTranscriptionService
 
 router = APIRouter()
 
@@ -20,13 +32,16 @@ logger = get_logger("transcription_router")
 
 @router.post("/transcribe/")
 async def transcribe(
-    transcription_service: TranscriptionService = Depends(get_transcription_service),
+    transcription_service: BaseTranscriptionService = Depends(get_transcription_service),
     uuid: str = Form(...),
     connection_id: str = Form(...),
     turn_number: str = Form(...),
     model_type: str = Form(...),
     call_type: str = Form(...),
     file: UploadFile = File(...),
+    early_stop: bool = Form(c.EARLY_STOP),
+    encoding: Optional[str] = Form(None),
+    sample_rate: int = Form(c.RAW_SAMPLE_RATE),
 ):
     if turn_number is not None:
         turn_number = int(turn_number)
@@ -45,45 +60,233 @@ async def transcribe(
             status_code=503,
             detail="Server is shutting down. No new requests are being accepted.",
         )
+    _check_raw_encoding(encoding, sample_rate)
     temp_file = None
+    try:
+        loop = asyncio.get_running_loop()
+        if encoding is not None:
+            # Headerless telephony audio, converted with NumPy instead of a container decoder
+            with STAGE_SECONDS.time(stage="upload_read"):
+                data = await file.read()
+            with STAGE_SECONDS.time(stage="audio_decode"):
+                audio = await loop.run_in_executor(None, decode_raw, data, encoding, sample_rate)
+        elif c.IN_MEMORY_DECODE:
+            # Decode the upload straight into a float32 array, no disk round trip
+            with STAGE_SECONDS.time(stage="upload_read"):
+                data = await file.read()
+            with STAGE_SECONDS.time(stage="audio_decode"):
+                audio = await loop.run_in_executor(None, decode_audio_bytes, data)
+        else:
+            # Save uploaded file to a temporary file
+            temp_file = NamedTemporaryFile(delete=False)
+            with STAGE_SECONDS.time(stage="upload_read"):
+                data = await file.read()
+            async with aiofiles.open(temp_file.name, mode="wb") as f:
+                await f.write(data)
+            temp_file.close()
+            audio = temp_file.name
+            print(f"Temporary file created at {temp_file.name}")
+
+        try:
+            return await _transcribe_and_label(
+                transcription_service, audio, uuid, connection_id, turn_number, model_type, call_type, early_stop
+            )
+        except AdmissionRejected as e:
+            logger.warning(
+                f"Rejecting transcription request: {e}",
+                extra={"serial_number": connection_id},
+            )
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"An error occurred during transcription: {e}",
+            extra={"serial_number": connection_id},
+        )
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if temp_file is not None:
+            # Delete the temporary file
+            os.unlink(temp_file.name)
+
+
+@router.post("/transcribe/batch")
+async def transcribe_batch(
+    transcription_service: BaseTranscriptionService = Depends(get_transcription_service),
+    connection_id: str = Form(...),
+    items: str = Form(...),
+    files: List[UploadFile] = File(...),
+):
+    """Transcribe many clips in one request and stream one NDJSON line per clip as it finishes.
+
+    ``items`` is a JSON list aligned with ``files``, each entry holding uuid, turn_number,
+    call_type and model_type. Every line carries the item's ``index`` in that list.
+    """
+    if transcription_service.shutdown_in_progress:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is shutting down. No new requests are being accepted.",
+        )
+    try:
+        items = json.loads(items)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"items is not valid JSON: {e}")
+    if not isinstance(items, list) or len(items) != len(files):
+        raise HTTPException(status_code=422, detail="items must be a JSON list with one entry per file")
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise HTTPException(status_code=422, detail=f"items[{index}] must be a JSON object")
+        if not isinstance(item.get("early_stop", c.EARLY_STOP), bool):
+            # A JSON string such as "false" would otherwise be truthy
+            raise HTTPException(status_code=422, detail=f"items[{index}].early_stop must be true or false")
+        if item.get("sample_rate") is None:
+            item["sample_rate"] = c.RAW_SAMPLE_RATE
+        _check_raw_encoding(item.get("encoding"), item["sample_rate"])
+
+    # Read every upload before streaming, the multipart body is not available afterwards
+    uploads = []
+    for file in files:
+        with STAGE_SECONDS.time(stage="upload_read"):
+            uploads.append(await file.read())
+
+    # Only a few clips in flight, so live traffic keeps most of the inference slots
+    semaphore = asyncio.Semaphore(c.TRANSCRIBE_BATCH_CONCURRENCY)
+
+    async def run(index, item, data):
+        uuid = item.get("uuid")
+        async with semaphore:
+            try:
+                loop = asyncio.get_running_loop()
+                with STAGE_SECONDS.time(stage="audio_decode"):
+                    if item.get("encoding") is not None:
+                        audio = await loop.run_in_executor(
+                            None, decode_raw, data, item["encoding"], item["sample_rate"]
+                        )
+                    else:
+                        audio = await loop.run_in_executor(None, decode_audio_bytes, data)
+                for attempt in range(c.TRANSCRIBE_BATCH_MAX_RETRIES + 1):
+                    try:
+                        result = await _transcribe_and_label(
+                            transcription_service,
+                            audio,
+                            uuid,
+                            connection_id,
+                            int(item.get("turn_number") or 1),
+                            item.get("model_type") or "A",
+                            item.get("call_type"),
+                            item.get("early_stop", c.EARLY_STOP),
+                        )
+                        break
+                    except AdmissionRejected as e:
+                        if attempt == c.TRANSCRIBE_BATCH_MAX_RETRIES:
+                            raise
+                        # Back off instead of failing the item, live calls take priority
+                        await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                logger.error(
+                    f"An error occurred during batch transcription of item {index}: {e}",
+                    extra={"serial_number": connection_id},
+                )
+                result = {"uuid": uuid, "error": str(e)}
+        return {"index": index, **result}
+
+    async def stream():
+        tasks = [
+            asyncio.ensure_future(run(index, item, data))
+            for index, (item, data) in enumerate(zip(items, uploads))
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield json.dumps(await task) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    logger.info(f"Batch transcription of {len(files)} files", extra={"serial_number": connection_id})
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def _check_raw_encoding(encoding, sample_rate=c.RAW_SAMPLE_RATE):
+    if encoding is None:
+        return
+    if encoding not in RAW_ENCODINGS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unsupported encoding: {encoding}, expected one of {sorted(RAW_ENCODINGS)}",
+        )
+    if isinstance(sample_rate, bool) or not isinstance(sample_rate, int) or sample_rate <= 0:
+        raise HTTPException(status_code=422, detail=f"sample_rate must be a positive integer, got {sample_rate}")
+
+
+async def _transcribe_and_label(transcription_service, audio, uuid, connection_id, turn_number, model_type, call_type,
+                                early_stop=False):
+    """Cache lookup, transcription and labeling of one decoded clip, shared by the HTTP endpoints.
+
+    Raises AdmissionRejected when no inference slot is available.
+    """
+    loop = asyncio.get_running_loop()
     transcribed_text = None
+    transcription_info = {}
     processed_transcribed_text = None
-    try:
-        model_used = "None"
-        # Save uploaded file to a temporary file
-        temp_file = NamedTemporaryFile(delete=False)
-        async with aiofiles.open(temp_file.name, mode="wb") as f:
-            await f.write(await file.read())
-        temp_file.close()
-        audio_file_path = temp_file.name
-        print(f"Temporary file created at {temp_file.name}")
+    model_used = "None"
+    cache_key = None
+    durations = None
+    error = None
+    async with transcription_service.admission.slot():
+        if c.RESULT_CACHE and isinstance(audio, np.ndarray):
+            # Preprocessed inside the slot, so a burst is rejected before any trimming or hashing,
+            # and only once: transcribe_audio reuses the result
+            audio, durations, cache_key = await loop.run_in_executor(
+                transcription_service.executor,
+                transcription_service.prepare, audio, call_type, model_type, turn_number, early_stop,
+            )
+            cached = transcription_service.result_cache.get(cache_key)
+            if cached is not None:
+                logger.debug(
+                    f"Transcription cache hit: {cached['transcription']}",
+                    extra={"serial_number": connection_id},
+                )
+                return {
+                    "uuid": uuid,
+                    **cached,
+                    "transcription_time": 0.0,
+                    "classification_time": 0.0,
+                    "transcription_info": {**cached["transcription_info"], "cache": "hit"},
+                    "short_circuited": "early_stop" in cached["transcription_info"],
+                    "error": None,
+                }
 
         start_time = time.time()
-        loop = asyncio.get_running_loop()
         try:
-            transcribed_text = await loop.run_in_executor(
-                None,
-                transcription_service.transcribe_audio,
-                audio_file_path,
-                call_type,
-                model_type,
-                turn_number,
+            transcribed_text, transcription_info = await loop.run_in_executor(
+                transcription_service.executor,
+                functools.partial(
+                    transcription_service.transcribe_audio,
+                    audio,
+                    call_type,
+                    model_type,
+                    turn_number,
+                    early_stop=early_stop,
+                    durations=durations,
+                ),
             )
         except Exception as e:
             logger.error(
                 f"An error occurred during transcription in endpoint: {e}",
                 extra={"serial_number": connection_id},
             )
-        end_time = time.time()
-        transcription_time = end_time - start_time
-        logger.debug(
-            f"Transcription completed: {transcribed_text} and the time is: {transcription_time}",
-            extra={"serial_number": connection_id},
-        )
+            error = str(e)
+    end_time = time.time()
+    transcription_time = end_time - start_time
+    logger.debug(
+        f"Transcription completed: {transcribed_text} and the time is: {transcription_time}",
+        extra={"serial_number": connection_id},
+    )
 
-        classification_start_time = time.time()
-        e = None
-        try:
+    classification_start_time = time.time()
+    try:
+        with STAGE_SECONDS.time(stage="process_transcription"):
             (
                 label,
                 confidence,
@@ -91,42 +294,278 @@ async def transcribe(
                 model_used,
             ) = await loop.run_in_executor(
                 None,
-                transcription_processor.process_transcription,
+                transcription_processor.label_transcription,
                 transcribed_text,
+                transcription_info,
                 connection_id,
                 model_type,
                 call_type,
                 turn_number,
             )
-        except Exception as e:
-            logger.error(
-                f"An error occurred during classification in endpoint: {e}",
-                extra={"serial_number": connection_id},
-            )
-            label = "N"
-            confidence = 1.5
+    except Exception as e:
+        logger.error(
+            f"An error occurred during classification in endpoint: {e}",
+            extra={"serial_number": connection_id},
+        )
+        label = "N"
+        confidence = 1.5
+        error = str(e)
+
+    classification_time = time.time() - classification_start_time
+
+    response_data = {
+        "uuid": uuid,
+        "transcription": transcribed_text,
+        "label": label,
+        "confidence": confidence,
+        "transcription_time": transcription_time,
+        "classification_time": classification_time,
+        "processed_transcribed_text": processed_transcribed_text,
+        "model_used": model_used,
+        "transcription_info": transcription_info,
+        # Decoding stopped at a segment the rules had already labeled
+        "short_circuited": "early_stop" in transcription_info,
+        "error": error,
+    }
+
+    # Failed transcriptions and classifier fallbacks are not worth repeating
+    if cache_key is not None and error is None and model_used != "CE":
+        transcription_info["cache"] = "miss"
+        transcription_service.result_cache.set(cache_key, {
+            "transcription": transcribed_text,
+            "label": label,
+            "confidence": confidence,
+            "processed_transcribed_text": processed_transcribed_text,
+            "model_used": model_used,
+            "transcription_info": dict(transcription_info),
+        })
+
+    return response_data
+
+
+@router.websocket("/transcribe/stream")
+async def transcribe_stream(
+    websocket: WebSocket,
+    transcription_service: BaseTranscriptionService = Depends(get_transcription_service),
+):
+    """Streaming transcription.
+
+    The client sends one JSON message with uuid, connection_id, turn_number, model_type,
+    call_type, sample_rate and encoding (pcm_s16le or mulaw), then binary mono audio chunks, then the
+    text message "end". Partial transcriptions of the latest window are pushed back with an
+    early label from the substring/exact rules, followed by one final result.
+    """
+    await websocket.accept()
+    if transcription_service.shutdown_in_progress:
+        await websocket.close(code=1013, reason="Server is shutting down")
+        return
 
-        classification_time = time.time() - classification_start_time
+    config = await websocket.receive_json()
+    uuid = config.get("uuid")
+    connection_id = str(config.get("connection_id"))
+    turn_number = int(config.get("turn_number") or 1)
+    model_type = config.get("model_type") or "A"
+    call_type = config.get("call_type")
+    sample_rate = int(config.get("sample_rate") or SAMPLE_RATE)
+    encoding = config.get("encoding") or "pcm_s16le"
+    if encoding not in RAW_ENCODINGS:
+        await websocket.close(code=1003, reason=f"Unsupported encoding: {encoding}")
+        return
+    if sample_rate <= 0:
+        await websocket.close(code=1003, reason=f"sample_rate must be positive, got {sample_rate}")
+        return
+    convert, sample_width = RAW_ENCODINGS[encoding]
 
-        response_data = {
+    window = int(c.STREAM_WINDOW_SECONDS * SAMPLE_RATE)
+    step = int(c.STREAM_STEP_SECONDS * SAMPLE_RATE)
+    chunks = []
+    pending = b""
+    received = 0
+    last_partial = 0
+    partial_task = None
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                data = pending + message["bytes"]
+                usable = len(data) - len(data) % sample_width
+                pending = data[usable:]
+                chunk = resample(convert(data[:usable]), sample_rate)
+                chunks.append(chunk)
+                received += len(chunk)
+                # Only one partial decode in flight, later audio is picked up by the next one
+                if received - last_partial >= step and (partial_task is None or partial_task.done()):
+                    last_partial = received
+                    chunks = [np.concatenate(chunks)]
+                    partial_task = asyncio.create_task(_send_partial(
+                        websocket, transcription_service, chunks[0][-window:],
+                        call_type, model_type, turn_number, connection_id,
+                    ))
+            elif (message.get("text") or "").strip() == "end":
+                break
+
+        if partial_task is not None:
+            try:
+                await partial_task
+            except Exception as e:
+                # A failed partial must not cost the client its final result
+                logger.warning(
+                    f"Partial transcription failed: {e}",
+                    extra={"serial_number": connection_id},
+                )
+
+        start_time = time.time()
+        audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        async with transcription_service.admission.slot():
+            transcribed_text, transcription_info = await loop.run_in_executor(
+                transcription_service.executor,
+                transcription_service.transcribe_audio,
+                audio,
+                call_type,
+                model_type,
+                turn_number,
+            )
+        transcription_time = time.time() - start_time
+        with STAGE_SECONDS.time(stage="process_transcription"):
+            label, confidence, processed_transcribed_text, model_used = await loop.run_in_executor(
+                None,
+                transcription_processor.label_transcription,
+                transcribed_text or "",
+                transcription_info,
+                connection_id,
+                model_type,
+                call_type,
+                turn_number,
+            )
+        await websocket.send_json({
+            "type": "final",
             "uuid": uuid,
             "transcription": transcribed_text,
             "label": label,
             "confidence": confidence,
             "transcription_time": transcription_time,
-            "classification_time": classification_time,
             "processed_transcribed_text": processed_transcribed_text,
             "model_used": model_used,
-            "error": e,
-        }
+            "audio_seconds": duration_seconds(audio),
+            "transcription_info": transcription_info,
+        })
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.debug("Streaming client disconnected", extra={"serial_number": connection_id})
+        if partial_task is not None:
+            partial_task.cancel()
+    except AdmissionRejected as e:
+        logger.warning(f"Rejecting streaming transcription: {e}", extra={"serial_number": connection_id})
+        await websocket.close(code=1013, reason=f"Try again later, retry after {e.retry_after}s")
+    except Exception as e:
+        logger.error(
+            f"An error occurred during streaming transcription: {e}",
+            extra={"serial_number": connection_id},
+        )
+        await websocket.close(code=1011, reason=str(e)[:120])
+
+
+async def _send_partial(websocket, transcription_service, audio, call_type, model_type, turn_number, connection_id):
+    loop = asyncio.get_running_loop()
+    start_time = time.time()
+
+    def transcribe_window():
+        # Preprocessed without the turn's clip window, which would keep the oldest audio of the window
+        preprocessed, durations = transcription_service.preprocess(audio)
+        return transcription_service.transcribe_audio(
+            preprocessed, call_type, model_type, turn_number, durations=durations
+        )
+
+    try:
+        async with transcription_service.admission.slot():
+            transcribed_text, _ = await loop.run_in_executor(transcription_service.executor, transcribe_window)
+    except AdmissionRejected:
+        # Partials are best effort, the next step or the final result catches up
+        return
+    label = transcription_processor.match_rules(transcribed_text, call_type) if transcribed_text else None
+    logger.debug(
+        f"Partial transcription: {transcribed_text} and early label is: {label}",
+        extra={"serial_number": connection_id},
+    )
+    await websocket.send_json({
+        "type": "partial",
+        "transcription": transcribed_text,
+        "label": label,
+        "transcription_time": time.time() - start_time,
+        "window_seconds": duration_seconds(audio),
+    })
+
+
+@router.post("/transcribe/compare")
+async def compare_prompts(
+    transcription_service: BaseTranscriptionService = Depends(get_transcription_service),
+    connection_id: str = Form(...),
+    prompts: str = Form(...),
+    profiles: Optional[str] = Form(None),
+    model: Optional[str] = Form(None),
+    file: UploadFile = File(...),
+):
+    """A/B prompt evaluation: decode one clip with every prompt and decoding profile given.
+
+    ``prompts`` is a JSON list of prompt names from ``/prompts/`` (null for no prompt) and
+    ``profiles`` a JSON list of decoding profiles, by default the default profile. ``model``
+    picks one of the loaded Whisper models. The clip is encoded once and only the decoder runs
+    per variant.
+    """
+    try:
+        prompts = json.loads(prompts)
+        profiles = json.loads(profiles) if profiles else [c.DEFAULT_DECODING_PROFILE]
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"prompts and profiles must be JSON lists: {e}")
+    variants = [(prompt, profile) for profile in profiles for prompt in prompts]
 
-        return response_data
+    loop = asyncio.get_running_loop()
+    data = await file.read()
+    try:
+        audio = await loop.run_in_executor(None, decode_audio_bytes, data)
+        async with transcription_service.admission.slot():
+            return await loop.run_in_executor(
+                transcription_service.executor, transcription_service.compare_prompts, audio, variants, model
+            )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(
-            f"An error occurred during transcription: {e}",
+            f"An error occurred during prompt comparison: {e}",
             extra={"serial_number": connection_id},
         )
-        if temp_file is not None:
-            # Delete the temporary file
-            os.unlink(temp_file.name)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/prompts/")
+async def prompts(transcription_service: BaseTranscriptionService = Depends(get_transcription_service)):
+    registry = transcription_service.prompt_registry
+    token_lengths = registry.token_lengths()
+    return {
+        "prompts": token_lengths,
+        "table": [
+            {
+                "turn_number": turn_number,
+                "call_type": call_type,
+                "model_type": model_type,
+                "prompt": name,
+                "prompt_tokens": token_lengths[name],
+            }
+            for (turn_number, call_type, model_type), name in registry.table.items()
+        ],
+    }
+
+
+@router.get("/admission/stats")
+async def admission_stats(transcription_service: BaseTranscriptionService = Depends(get_transcription_service)):
+    return transcription_service.admission.stats()
+
+
+@router.get("/cache/stats")
+async def cache_stats(transcription_service: BaseTranscriptionService = Depends(get_transcription_service)):
+    return transcription_service.result_cache.stats()
@@ -0,0 +1,167 @@
+import asyncio
+import collections
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client
+
+from voiceflow_ai.core.admission import AdmissionController
+from voiceflow_ai.core.audio import load_audio
+from voiceflow_ai.core.cache import TTLCache
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.logger import get_logger
+from voiceflow_ai.core.prompts import Prompt, PromptRegistry
+from voiceflow_ai.services.transcription_base import STARTUP_SECONDS, BaseTranscriptionService
+
+logger = get_logger("RemoteTranscriptionService")
+
+
+class ModelServerError(Exception):
+    """An exception raised inside the model server while handling a call."""
+
+
+def model_server_address(address=None):
+    """Unix socket path, or a (host, port) tuple for "host:port"."""
+    address = address or c.MODEL_SERVER_ADDRESS
+    if "/" not in address and ":" in address:
+        host, port = address.rsplit(":", 1)
+        return host, int(port)
+    return address
+
+
+def check_authkey(address, authkey):
+    """Refuse a TCP address without an authkey, anyone reaching the port could run code through pickle."""
+    if not isinstance(address, str) and not authkey:
+        raise ValueError(
+            f"The model server at {address[0]}:{address[1]} needs VOICEFLOW_MODEL_SERVER_AUTHKEY set, "
+            f"or use a Unix socket path"
+        )
+
+
+class RemoteTranscriptionService(BaseTranscriptionService):
+    """Thin front end that forwards inference to the node's shared model server.
+
+    Same interface as TranscriptionService for the routers and the app. Prompts, cache keys,
+    admission and the result cache stay local, only Whisper runs in the model server.
+    """
+
+    def __init__(self, address=None, authkey=None):
+        self.address = model_server_address(address)
+        self.authkey = authkey or c.MODEL_SERVER_AUTHKEY
+        check_authkey(self.address, self.authkey)
+        # Idle connections, one per concurrent call at most since each executor thread holds one
+        self.connections = queue.LifoQueue()
+        self.ready = False
+        self.batchers = {}
+        # Model routing mirrored from the model server, for cache keys
+        self.default_model = c.WHISPER_MODEL_SIZE
+        self.model_table = {}
+        self.prompt_registry = PromptRegistry()
+        self.result_cache = TTLCache(c.RESULT_CACHE_MAX_ENTRIES, c.RESULT_CACHE_TTL_SECONDS)
+        # Encoder outputs are cached in the model server, this one stays empty
+        self.encoder_cache = TTLCache(0, c.ENCODER_CACHE_TTL_SECONDS)
+        self.admission = AdmissionController(
+            c.INFERENCE_CONCURRENCY, c.INFERENCE_QUEUE_DEPTH, c.INFERENCE_MAX_WAIT_SECONDS
+        )
+        self.executor = ThreadPoolExecutor(max_workers=c.INFERENCE_CONCURRENCY, thread_name_prefix="inference")
+        self.shutdown_in_progress = False
+        self.active_transcriptions_count = 0
+        self.active_transcriptions = collections.deque()
+        self.test_file = c.MODEL_LOAD_FILEPATH
+        self.startup_timings = {}
+
+    def initialize_model(self):
+        try:
+            start_time = time.perf_counter()
+            deadline = start_time + c.MODEL_SERVER_CONNECT_TIMEOUT_SECONDS
+            while True:
+                try:
+                    # The server only listens once Whisper is loaded and warmed up
+                    status = self._call("ping")
+                    break
+                except (OSError, EOFError) as e:
+                    if time.perf_counter() > deadline:
+                        raise
+                    logger.info(f"Waiting for the model server at {self.address}: {e}")
+                    time.sleep(1)
+            logger.info(f"Connected to the model server at {self.address}: {status}")
+            self.default_model = status["default_model"]
+            self.model_table = status["model_table"]
+
+            prompt_tokens = self._call("prompt_tokens")
+            self.prompt_registry.prompts = {
+                name: Prompt(name, prompt.text, prompt_tokens.get(name))
+                for name, prompt in self.prompt_registry.prompts.items()
+            }
+            self.transcribe_audio(self.test_file, "medicare", "A", 1)
+            self.ready = True
+
+            self.startup_timings = {"total": time.perf_counter() - start_time}
+            for phase, seconds in self.startup_timings.items():
+                STARTUP_SECONDS.set(seconds, phase=phase)
+            logger.info(f"Remote transcription ready, startup timings: {self.startup_timings}")
+            return True
+        except Exception as e:
+            logger.error(f"Error while connecting to the model server: {e}", exc_info=True)
+            return False
+
+    def transcribe_audio(self, audio, call_type, model_type, turn_number=1, early_stop=False, durations=None):
+        self.active_transcriptions_count += 1
+        self.active_transcriptions.append(time.time())
+        try:
+            # Decoded here, the model server does not share this container's filesystem
+            return self._call(
+                "transcribe_audio", load_audio(audio), call_type, model_type, turn_number,
+                early_stop=early_stop, durations=durations,
+            )
+        except Exception as error:
+            logger.error(f"Error during remote transcription: {error}")
+            raise
+        finally:
+            self.active_transcriptions_count -= 1
+            self.active_transcriptions.popleft()
+
+    def compare_prompts(self, audio, variants, model_name=None):
+        try:
+            return self._call("compare_prompts", load_audio(audio), variants, model_name)
+        except ModelServerError as e:
+            # Validation errors come back as text, keep them client errors
+            raise ValueError(str(e))
+
+    def _call(self, method, *args, **kwargs):
+        for attempt in range(2):
+            connection = None
+            if attempt == 0:
+                try:
+                    connection = self.connections.get_nowait()
+                except queue.Empty:
+                    pass
+            pooled = connection is not None
+            if connection is None:
+                connection = Client(self.address, authkey=self.authkey)
+            try:
+                connection.send((method, args, kwargs))
+                status, result = connection.recv()
+            except (OSError, EOFError):
+                connection.close()
+                # A pooled connection may predate a model server restart, retry on a fresh one
+                if pooled:
+                    continue
+                raise
+            self.connections.put(connection)
+            if status == "error":
+                raise ModelServerError(result)
+            return result
+
+    async def shutdown(self):
+        self.shutdown_in_progress = True
+        while self.active_transcriptions_count > 0:
+            await asyncio.sleep(0.1)
+        self.ready = False
+        while True:
+            try:
+                self.connections.get_nowait().close()
+            except queue.Empty:
+                break
+        self.executor.shutdown(wait=False)
+        logger.info("Graceful shutdown completed.")
@@ -0,0 +1,70 @@
+"""Routing, preprocessing and result cache keys shared by the local and remote transcription services.
+
+Kept free of torch, CTranslate2 and faster-whisper so remote front ends do not load them.
+"""
+import hashlib
+
+from voiceflow_ai.core.audio import SAMPLE_RATE, duration_seconds, load_audio, trim_silence
+from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.decoding import clip_window, lookup_turn, select_profile
+from voiceflow_ai.core.metrics import REGISTRY
+
+STARTUP_SECONDS = REGISTRY.gauge(
+    "voiceflow_startup_seconds", "Time spent in each startup phase", ["phase"]
+)
+
+
+class BaseTranscriptionService:
+    """What runs in the front end whether Whisper is in-process or in the model server.
+
+    Subclasses set ``default_model``, ``model_table`` and ``prompt_registry``.
+    """
+
+    def select_model(self, call_type, turn_number):
+        return lookup_turn(self.model_table, call_type, turn_number) or self.default_model
+
+    @staticmethod
+    def preprocess(audio, call_type=None, turn_number=None):
+        """Decode to 16 kHz mono, trim leading/trailing silence and cut the turn's clip window.
+
+        Returns the audio and its durations; ``trimmed_seconds`` is what gets decoded.
+        """
+        audio = load_audio(audio)
+        original_seconds = duration_seconds(audio)
+        if c.TRIM_SILENCE:
+            audio = trim_silence(audio, c.TRIM_ENERGY_DB, c.TRIM_PADDING_MS)
+        clipped_seconds = 0.0
+        window = clip_window(call_type, turn_number)
+        if window is not None and len(audio) > int(window * SAMPLE_RATE):
+            # Applied after trimming so the window starts at the caller's first words
+            clipped_seconds = duration_seconds(audio) - window
+            audio = audio[:int(window * SAMPLE_RATE)]
+        return audio, {
+            "original_seconds": original_seconds,
+            "trimmed_seconds": duration_seconds(audio),
+            "clipped_seconds": clipped_seconds,
+        }
+
+    def prepare(self, audio, call_type, model_type, turn_number, early_stop=False):
+        """Preprocess a decoded clip once for both the result cache and transcribe_audio.
+
+        Returns the preprocessed audio, its durations and the result cache key.
+        """
+        preprocessed, durations = self.preprocess(audio, call_type, turn_number)
+        key = self.cache_key(audio, call_type, model_type, turn_number, early_stop, durations["trimmed_seconds"])
+        return preprocessed, durations, key
+
+    def cache_key(self, audio, call_type, model_type, turn_number, early_stop=False, trimmed_seconds=None):
+        """Content hash of the decoded PCM and everything that selects how it is decoded and labeled."""
+        prompt = self.prompt_registry.lookup(call_type, model_type, turn_number)
+        if trimmed_seconds is None:
+            # Same duration the decoding profile is selected from in transcribe_audio
+            trimmed, _ = self.preprocess(audio, call_type, turn_number)
+            trimmed_seconds = duration_seconds(trimmed)
+        profile_name, _ = select_profile(call_type, turn_number, trimmed_seconds)
+        digest = hashlib.blake2b(audio.tobytes(), digest_size=16)
+        digest.update(repr((
+            self.select_model(call_type, turn_number), prompt.name if prompt is not None else None, profile_name,
+            call_type, model_type, turn_number, early_stop,
+        )).encode())
+        return digest.hexdigest()
@@ -1,275 +1,481 @@
 import asyncio
 import collections
+import functools
+import hashlib
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import ctranslate2
+import numpy as np
 import torch
 from faster_whisper import WhisperModel
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_suppressed_tokens
 
+from voiceflow_ai.core.admission import AdmissionController
+from voiceflow_ai.core.audio import SAMPLE_RATE, detect_speech, duration_seconds, load_audio
+from voiceflow_ai.core.batching import MicroBatcher
+from voiceflow_ai.core.cache import TTLCache
 from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.decoding import (
+    generate_options, is_no_speech, needs_fallback, select_profile, transcribe_options,
+)
 from voiceflow_ai.core.logger import get_logger
+from voiceflow_ai.core.metrics import REGISTRY, STAGE_SECONDS
+from voiceflow_ai.core.prompts import ANY, PromptRegistry
+from voiceflow_ai.core.transcription_processor import TranscriptionProcessor
+from voiceflow_ai.services.transcription_base import STARTUP_SECONDS, BaseTranscriptionService
 
 logger = get_logger("TranscriptionService")
 
+BATCH_SIZE = REGISTRY.histogram(
+    "voiceflow_whisper_batch_size", "Requests per batched Whisper decode", ["model", "profile"],
+    buckets=(1, 2, 4, 8, 16, 32),
+)
 
-class TranscriptionService:
+ROUTE_REQUESTS = REGISTRY.counter(
+    "voiceflow_whisper_route_requests_total", "Transcriptions per Whisper model route",
+    ["model", "call_type", "turn_number"],
+)
+
+ROUTE_SECONDS = REGISTRY.histogram(
+    "voiceflow_whisper_route_duration_seconds", "Whisper inference latency per model route",
+    ["model", "call_type", "turn_number"],
+)
+
+# Whisper decoder context; faster-whisper keeps at most half of it for the prompt
+MAX_TEXT_CONTEXT = 448
+
+
+class TranscriptionService(BaseTranscriptionService):
     def __init__(self):
+        # Default model, plus every model named in the routing table by name
         self.whisper_model = None
+        self.whisper_models = {}
+        self.default_model = c.WHISPER_MODEL_SIZE
+        self.model_table = {}
+        self.tokenizer = None
+        # What WhisperModel.transcribe suppresses, for the batched generate calls
+        self.suppress_tokens = list(c.SUPPRESS_TOKENS)
+        # (model name, decoding profile name) -> MicroBatcher
+        self.batchers = {}
+        self.prompt_registry = PromptRegistry()
+        # Rules only, for early stop; labeling itself stays in the routers
+        self.rules = TranscriptionProcessor()
+        self.result_cache = TTLCache(c.RESULT_CACHE_MAX_ENTRIES, c.RESULT_CACHE_TTL_SECONDS)
+        self.encoder_cache = TTLCache(c.ENCODER_CACHE_MAX_ENTRIES, c.ENCODER_CACHE_TTL_SECONDS)
+        self.admission = AdmissionController(
+            c.INFERENCE_CONCURRENCY, c.INFERENCE_QUEUE_DEPTH, c.INFERENCE_MAX_WAIT_SECONDS
+        )
+        # Bounded pool for model calls, sized to the admitted concurrency
+        self.executor = ThreadPoolExecutor(max_workers=c.INFERENCE_CONCURRENCY, thread_name_prefix="inference")
         self.shutdown_in_progress = False
         self.active_transcriptions_count = 0
         self.active_transcriptions = collections.deque()
         self.test_file = c.MODEL_LOAD_FILEPATH
+        self.startup_timings = {}
 
-    def initialize_model(self):
+    @property
+    def ready(self):
+        return self.whisper_model is not None
+
+    def initialize_model(self, model_size=None, compute_type=None, cpu_threads=0, num_workers=1):
+        """Load Whisper, start the batchers and warm up. ``compute_type`` defaults to int8 on CPU
+        and float16 on GPU; ``cpu_threads=0`` lets CTranslate2 pick.
+
+        Without ``model_size`` every model in WHISPER_MODEL_TABLE is loaded and routed to, with
+        one it serves every turn.
+        """
         try:
+            start_time = time.perf_counter()
             device = "cuda" if torch.cuda.is_available() else "cpu"
-            model_size = "small.en"
             logger.info(f"device is: {device}")
-            if device == "cpu":
-                self.whisper_model = WhisperModel(model_size, device=device, compute_type="int8")
+            if compute_type is None:
+                compute_type = "int8" if device == "cpu" else "float16"
+            if model_size is None:
+                self.default_model = c.WHISPER_MODEL_SIZE
+                self.model_table = dict(c.WHISPER_MODEL_TABLE)
             else:
-                self.whisper_model = WhisperModel(
-                    model_size, device=device, compute_type="float16", num_workers=1
+                self.default_model = model_size
+                self.model_table = {}
+
+            for name in [self.default_model, *sorted(set(self.model_table.values()) - {self.default_model})]:
+                self.whisper_models[name] = WhisperModel(
+                    name,
+                    device=device,
+                    compute_type=compute_type,
+                    cpu_threads=cpu_threads,
+                    num_workers=num_workers,
                 )
-            logger.info(f"Whisper loaded and model size is: {model_size}")
-            time.sleep(1)
+                logger.info(f"Whisper loaded and model size is: {name}, compute type is: {compute_type}")
+            self.whisper_model = self.whisper_models[self.default_model]
+
+            multilingual = self.whisper_model.model.is_multilingual
+            self.tokenizer = Tokenizer(
+                self.whisper_model.hf_tokenizer,
+                multilingual,
+                task="transcribe",
+                language="en" if multilingual else None,
+            )
+            # Prompts are tokenized once, so every routed model has to share the vocabulary
+            for name, model in self.whisper_models.items():
+                if (model.model.is_multilingual != multilingual
+                        or model.hf_tokenizer.get_vocab_size() != self.whisper_model.hf_tokenizer.get_vocab_size()):
+                    raise ValueError(f"Whisper model {name} does not share the tokenizer of {self.default_model}")
+            self.prompt_registry.load(self.tokenizer)
+            # SUPPRESS_TOKENS plus the special tokens, as transcribe builds it on the serial path
+            self.suppress_tokens = get_suppressed_tokens(self.tokenizer, c.SUPPRESS_TOKENS)
+            if c.WHISPER_BATCHING:
+                # One batcher per model and decoding profile, a batch shares a single beam search setup
+                for model_name in self.whisper_models:
+                    for name, profile in c.DECODING_PROFILES.items():
+                        batcher = MicroBatcher(
+                            functools.partial(
+                                self._transcribe_batch, model_name=model_name, profile_name=name, profile=profile
+                            ),
+                            max_batch_size=c.WHISPER_BATCH_MAX_SIZE,
+                            max_wait_ms=c.WHISPER_BATCH_WAIT_MS,
+                            name=f"whisper-batcher-{model_name}-{name}",
+                        )
+                        batcher.start()
+                        self.batchers[(model_name, name)] = batcher
+            model_loaded_time = time.perf_counter()
+
+            warmup_decodes = 0
+            if c.WARMUP:
+                try:
+                    warmup_decodes = self.warmup()
+                except Exception as e:
+                    # Warmup only saves first-call latency, the test transcription decides readiness
+                    logger.warning(f"Whisper warmup failed, continuing without it: {e}", exc_info=True)
             self.transcribe_audio(self.test_file, "medicare", "A", 1)
-            logger.info("Whisper model has been loaded to the device")
+            end_time = time.perf_counter()
+
+            self.startup_timings = {
+                "model_load": model_loaded_time - start_time,
+                "warmup": end_time - model_loaded_time,
+                "total": end_time - start_time,
+            }
+            for phase, seconds in self.startup_timings.items():
+                STARTUP_SECONDS.set(seconds, phase=phase)
+            logger.info(f"Whisper model has been loaded to the device, {warmup_decodes} warmup decodes, "
+                        f"startup timings: {self.startup_timings}")
             return True
         except Exception as e:
             logger.error(f"Error during whisper initialization: {e}", exc_info=True)
             return False
 
-    def transcribe_audio(self, file_path, call_type, model_type, turn_number=1):
-        try:
-            transcribed_text = None
-            self.active_transcriptions_count += 1
-            self.active_transcriptions.append(time.time())
-            initial_prompt = None
-            if self.whisper_model is not None and c.TYPE:
-                if turn_number == 4 and call_type == "medicare":
-                    initial_prompt = (
-                        "fifty-one, fifty-two, fifty-three, fifty-four, fifty-five, fifty-six, "
-                        "fifty-seven, fifty-eight, fifty-nine, sixty, sixty-one, sixty-two, sixty-three, "
-                        "sixty-four, sixty-five, sixty-six, sixty-seven, sixty-eight, sixty-nine, "
-                        "seventy, seventy-one, seventy-two, seventy-three, seventy-four, seventy-five, "
-                        "seventy-six, seventy-seven, seventy-eight, seventy-nine, eighty, eighty-one, "
-                        "eighty-two, eighty-three, eighty-four, eighty-five, eighty-six, eighty-seven, "
-                        "eighty-eight, eighty-nine, ninety, ninety-one, ninety-two, ninety-three, "
-                        "ninety-four, ninety-five, ninety-six, ninety-seven, ninety-eight, ninety-nine, "
-                        "one hundred, one hundred and one, one hundred and two, one hundred and three, "
-                        "one hundred and four, one hundred and five, one hundred and six, "
-                        "one hundred and seven, one hundred and eight, one hundred and nine, "
-                        "one hundred and ten"
-                    )
+    def warmup(self):
+        """Decode the test clip with every model/profile/prompt combination routing can produce.
 
-                elif turn_number == 6 and call_type == "aca" and model_type == "A":
-                    initial_prompt = (
-                        "Yes, no, I do, I don't, yes I do, no I don't, sure, I'm sure, yeah, nah, absolutely, of course, "
-                        "true, false, it is, it's, more, more than, less, less than, none, sir, ma'am, higher, lower, "
-                        "employed, unemployed, making, nothing, I make more, I make less, how, what, who, how much, say, "
-                        "I don't know, interested, call, list, hang up, recording, recorded, transfer, invalid, business, "
-                        "10000, 12000, 13000, 15000, 20000, 25000, 30000, 35000, 40000, 43000, 50000, 55000, 60000, 80000, "
-                        "90000, 100000, 120000, 150000, 200000, 1000, 1500, 2000, 3000, 150, 200, 350, dollars, a year, a month, "
-                        "a week, an hour, income"
-                    )
-                elif turn_number == 5 and call_type == "aca" and model_type == "A":
-                    initial_prompt = (
-                        "fifty-one, fifty-two, fifty-three, fifty-four, fifty-five, fifty-six, "
-                        "fifty-seven, fifty-eight, fifty-nine, sixty, sixty-one, sixty-two, sixty-three, "
-                        "sixty-four, sixty-five, sixty-six, sixty-seven, sixty-eight, sixty-nine, "
-                        "seventy, seventy-one, seventy-two, seventy-three, seventy-four, seventy-five,"
-                        "seventy-six, seventy-seven, seventy-eight, seventy-nine, eighty, eighty-one, "
-                        "eighty-two, eighty-three, eighty-four, eighty-five, eighty-six, eighty-seven, "
-                        "eighty-eight, eighty-nine, ninety, ninety-one, "
-                        "yes, no, I am, years, old, under, over, age, born, "
-                        "twenty, twenty-four, twenty-nine, thirty, thirty-five, thirty-nine,"
-                        "forty, forty-seven, forty-one, nineteen, forty-two"
-                    )
+        The first decode of each beam width, prompt length and input size pays for allocations
+        and kernel selection, so this keeps that cost off real calls. Each (model, profile) gets
+        one batch per prompt, then the other clip lengths together under its longest prompt.
+        """
+        audio = load_audio(self.test_file)
+        clips = [np.resize(audio, int(seconds * SAMPLE_RATE)) for seconds in c.WARMUP_CLIP_SECONDS]
 
-                elif turn_number == 4 and call_type == "aca" and model_type == "B":
-                    initial_prompt = (
-                        "fifty-one, fifty-two, fifty-three, fifty-four, fifty-five, fifty-six, "
-                        "fifty-seven, fifty-eight, fifty-nine, sixty, sixty-one, sixty-two, sixty-three, "
-                        "sixty-four, sixty-five, sixty-six, sixty-seven, sixty-eight, sixty-nine, "
-                        "seventy, seventy-one, seventy-two, seventy-three, seventy-four, seventy-five,"
-                        "seventy-six, seventy-seven, seventy-eight, seventy-nine, eighty, eighty-one, "
-                        "eighty-two, eighty-three, eighty-four, eighty-five, eighty-six, eighty-seven, "
-                        "eighty-eight, eighty-nine, ninety, ninety-one, "
-                        "yes, no, I am, years, old, under, over, age, born, "
-                        "twenty, twenty-four, twenty-nine, thirty, thirty-five, thirty-nine,"
-                        "forty, forty-seven, forty-one, nineteen, forty-two"
-                    )
+        decodes = 0
+        for (model_name, profile_name), prompt_names in sorted(self.warmup_routes().items()):
+            profile = c.DECODING_PROFILES[profile_name]
+            prompt_tokens = [
+                self.prompt_registry.prompts[name].tokens if name is not None else None
+                for name in sorted(prompt_names, key=str)
+            ]
+            longest_prompt = max(prompt_tokens, key=lambda tokens: len(tokens or []))
+            batches = [[(clips[0], tokens)] for tokens in prompt_tokens]
+            batches.append([(clip, longest_prompt) for clip in clips[1:]])
+            batcher = self.batchers.get((model_name, profile_name))
+            for work in batches:
+                if batcher is not None:
+                    # Waited on before the next batch, so each prompt is decoded on its own
+                    for future in [batcher.submit(item) for item in work]:
+                        future.result()
+                else:
+                    for clip, tokens in work:
+                        self._transcribe_serial(model_name, clip, tokens, transcribe_options(profile))
+                decodes += len(work)
+            logger.info(f"Warmed up {model_name} with decoding profile {profile_name} in "
+                        f"{sum(map(len, batches))} decodes")
+        return decodes
 
-                elif turn_number == 3 and call_type == "fe":
-                    initial_prompt = (
-                        "fifty-one, fifty-two, fifty-three, fifty-four, fifty-five, fifty-six, "
-                        "fifty-seven, fifty-eight, fifty-nine, sixty, sixty-one, sixty-two, sixty-three, "
-                        "sixty-four, sixty-five, sixty-six, sixty-seven, sixty-eight, sixty-nine, "
-                        "seventy, seventy-one, seventy-two, seventy-three, seventy-four, seventy-five,"
-                        "seventy-six, seventy-seven, seventy-eight, seventy-nine, eighty, eighty-one, "
-                        "eighty-two, eighty-three, eighty-four, eighty-five, eighty-six, eighty-seven, "
-                        "eighty-eight, eighty-nine, ninety, ninety-one, "
-                        "yes, no, I am, years, old, under, over, age, born, "
-                        "twenty, twenty-four, twenty-nine, thirty, thirty-five, thirty-nine,"
-                        "forty, forty-seven, forty-one, nineteen, forty-two"
-                    )
+    def warmup_routes(self):
+        """(model name, profile name) -> names of the prompts a request can reach it with.
 
-                elif turn_number == 2 and call_type == "aca":
-                    initial_prompt = (
-                        "calling, want, need, what, hello, yes, no, sure, nah, not,"
-                        "connect,for, you, fine, how about you, I'm fine,"
-                        "yes sir, I'm, doing, alright, call, cannot, about, where, help, too, doing good, this, "
-                        "not, good, how, english, spanish, speak, I, may, hi, "
-                        "busy, moment, right, calling, help, pretty, yup, you, at, work, right now, "
-                        "I don't, I do, who, who's, quit, do, don't, what, and, just fine, and you, "
-                        "yeah, go ahead, help, going, can, I'm doing fine, I'm good, about"
-                    )
-                elif turn_number == 2 and call_type == "fe":
-                    initial_prompt = (
-                        "calling, want, need, what, hello, yes, no, sure, nah, not,"
-                        "connect,for, you, fine, how about you, I'm fine,"
-                        "yes sir, I'm, doing, alright, call, cannot, about, where, help, too, doing good, this, "
-                        "not, good, how, english, spanish, speak, I, may, hi, "
-                        "busy, moment, right, calling, help, pretty, yup, you, at, work, right now, "
-                        "I don't, I do, who, who's, quit, do, don't, what, and, just fine, and you, "
-                        "yeah, go ahead, help, going, can, I'm doing fine, I'm good, about"
-                    )
-                elif turn_number == 2 and call_type == "medicare" and model_type == "B":
-                    initial_prompt = (
-                        "calling, want, need, what, hello, yes, no, sure, nah, not,"
-                        "connect,for, you, fine, how about you, I'm fine,"
-                        "yes sir, I'm, doing, alright, call, cannot, about, where, help, too, doing good, this, "
-                        "not, good, how, english, spanish, speak, I, may, hi, "
-                        "busy, moment, right, calling, help, pretty, yup, you, at, work, right now, "
-                        "I don't, I do, who, who's, quit, do, don't, what, and, just fine, and you, "
-                        "yeah, go ahead, help, going, can, I'm doing fine, I'm good, about"
-                    )
-                elif turn_number == 4 and call_type == "fe":
-                    initial_prompt = (
-                        "yes, yeah, no, I do, I don't, absolutely, absolutely not, no I don't, sure, correct, "
-                        "incorrect, right, not, have, I have, do, don't, do what, interested, not interested, busy, "
-                        "stop, quit, take, take me, calling, call, remove, list, calling list, please, again, have "
-                        "what, any what, need, want, employed, employment, coverage, covered, old, retired, subsidy, "
-                        "qualified, eligible, not eligible, guess, I guess, through, is through, my insurance, "
-                        "entitlement, decisions, decide, final expense, burial, funeral, military, veteran, a veteran, "
-                        "social security, plan, card, work, back, say, say what, what, what now, why, who, "
-                        "Do I have, alright, nah, yes sir, no sir, english, spanish"
-                    )
+        Walks every call type, model type and turn named in the prompt, model and decoding profile
+        tables, plus a turn and a model type named in none of them for the wildcard entries.
+        """
+        prompt_table = self.prompt_registry.table
+        turn_tables = [self.model_table, c.DECODING_PROFILE_TABLE]
+        call_types = {key[1] for key in prompt_table} | {key[0] for table in turn_tables for key in table}
+        turns = {key[0] for key in prompt_table} | {key[1] for table in turn_tables for key in table}
+        turns = {turn for turn in turns if turn != ANY}
+        model_types = {key[2] for key in prompt_table} - {ANY}
+        # Stand-ins that only match wildcard entries
+        turns.add(max(turns, default=0) + 1)
+        model_types.add(None)
 
-                elif (
-                    (turn_number == 3 or turn_number == 4)
-                    and call_type == "aca"
-                    and model_type == "A"
-                ):
-                    initial_prompt = (
-                        "yes, yeah, no, I do, I don't, absolutely, absolutely not, no I don't, sure, correct, incorrect, right, not, "
-                        "have, I have, do, don't, do what, interested, not interested, busy, stop, quit, take, take me, calling, call, "
-                        "remove, list, calling list, please, again, have what, any what, need, want, employed, employment, coverage, covered, "
-                        "old, retired, subsidy, qualified, eligible, not eligible, guess, I guess, through, is through, my insurance, entitlement, "
-                        "not entitled, citizen, healthcare, insurance, insured, ACA, affordable care act, blue cross, blue shield, ambetter, "
-                        "aetna, humana, oscar, united, united health, Medicare, have medicare, Medicaid, have medicaid, tricare, VA, the VA, "
-                        "military, veteran, a veteran, social security, plan, card, work, back, say, say what, what, what now, why, who, "
-                        "Do I have, alright, nah, yes sir, no sir, english, spanish"
-                    )
+        routes = collections.defaultdict(set)
+        for call_type in call_types - {ANY}:
+            for turn_number in turns:
+                model_name = self.select_model(call_type, turn_number)
+                profile_names = {select_profile(call_type, turn_number)[0]}
+                if c.ADAPTIVE_DECODING:
+                    profile_names.add(c.SHORT_CLIP_PROFILE)
+                for model_type in model_types:
+                    prompt = self.prompt_registry.lookup(call_type, model_type, turn_number)
+                    for profile_name in profile_names:
+                        routes[(model_name, profile_name)].add(prompt.name if prompt is not None else None)
+        return routes
+
+    def transcribe_audio(self, audio, call_type, model_type, turn_number=1, early_stop=False, durations=None):
+        """Transcribe one utterance and return the text with per-request decoding info.
 
-                elif (
-                    (turn_number == 3 or turn_number == 5)
-                    and call_type == "aca"
-                    and model_type == "B"
-                ):
-                    initial_prompt = (
-                        "yes, yeah, no, I do, I don't, absolutely, absolutely not, no I don't, sure, correct, incorrect, right, not, "
-                        "have, I have, do, don't, do what, interested, not interested, busy, stop, quit, take, take me, calling, call, "
-                        "remove, list, calling list, please, again, have what, any what, need, want, employed, employment, coverage, covered, "
-                        "old, retired, subsidy, qualified, eligible, not eligible, guess, I guess, through, is through, my insurance, entitlement, "
-                        "not entitled, citizen, healthcare, insurance, insured, ACA, affordable care act, blue cross, blue shield, ambetter, "
-                        "aetna, humana, oscar, united, united health, Medicare, have medicare, Medicaid, have medicaid, tricare, VA, the VA, "
-                        "military, veteran, a veteran, social security, plan, card, work, back, say, say what, what, what now, why, who, "
-                        "Do I have, alright, nah, yes sir, no sir, english, spanish"
+        ``audio`` is either a decoded 16 kHz float32 array or anything faster-whisper can open.
+        With ``durations`` (from ``prepare``) it is taken as already preprocessed.
+        With ``early_stop`` segments are decoded one at a time on the serial path and decoding
+        stops at the first segment after which the rules give a terminal label.
+        """
+        transcribed_text = None
+        info = {"model": None, "batch_size": None, "prompt": None, "prompt_tokens": 0, "decoding_profile": None}
+        self.active_transcriptions_count += 1
+        self.active_transcriptions.append(time.time())
+        try:
+            if self.whisper_model is not None:
+                prompt = self.prompt_registry.lookup(call_type, model_type, turn_number)
+                prompt_tokens = prompt.tokens if prompt is not None else None
+                if prompt is not None:
+                    info["prompt"] = prompt.name
+                    info["prompt_tokens"] = len(prompt.tokens)
+                if durations is None:
+                    audio, durations = self.preprocess(audio, call_type, turn_number)
+                info.update(durations)
+                duration = durations["trimmed_seconds"]
+                logger.info(f"received audio of {durations['original_seconds']:.2f}s, {duration:.2f}s after trimming, "
+                            f"{durations['clipped_seconds']:.2f}s past the clip window dropped")
+                if c.SPEECH_GATE:
+                    gate_start = time.perf_counter()
+                    has_speech, voiced_seconds = detect_speech(
+                        audio,
+                        energy_threshold_db=c.SPEECH_GATE_ENERGY_DB,
+                        min_speech_ms=c.SPEECH_GATE_MIN_SPEECH_MS,
                     )
+                    info["speech_gate"] = {
+                        "speech": has_speech,
+                        "voiced_seconds": voiced_seconds,
+                        "time": time.perf_counter() - gate_start,
+                    }
+                    if not has_speech:
+                        return "", info
 
-                elif turn_number == 1:
-                    if call_type == "medicare":
-                        initial_prompt = (
-                            "what, okay, go ahead, speak, do you, need, hello, yes, yeah, call, who's calling, hi, "
-                            "hey, this, want, why, calling, leave, message, not available, sorry,thank you, bye"
-                        )
-                    if call_type == "aca":
-                        initial_prompt = (
-                            "what, okay, go ahead, speak, do you, need, hello, yes, yeah, call, who's calling, hi, "
-                            "hey, this, want, why, calling, leave, message, not available, sorry"
-                        )
-                    if call_type == "fe":
-                        initial_prompt = (
-                            "what, okay, go ahead, speak, do you, need, hello, yes, yeah, call, who's calling, hi, "
-                            "hey, this, want, why, calling, leave, message, not available, sorry"
+                model_name = self.select_model(call_type, turn_number)
+                info["model"] = model_name
+                profile_name, profile = select_profile(call_type, turn_number, duration)
+                info["decoding_profile"] = profile_name
+                # A batched decode returns all segments at once, so early stop runs serially
+                batcher = None if early_stop else self.batchers.get((model_name, profile_name))
+                route = {"model": model_name, "call_type": call_type, "turn_number": turn_number}
+                ROUTE_REQUESTS.inc(**route)
+                with STAGE_SECONDS.time(stage="whisper_inference"), ROUTE_SECONDS.time(**route):
+                    # Only single-window clips can share a batched encode/decode
+                    if batcher is not None and len(audio) <= self.whisper_model.feature_extractor.n_samples:
+                        future = batcher.submit((audio, prompt_tokens))
+                        transcribed_text, info["batch_size"] = future.result()
+
+                    if transcribed_text is None:
+                        options = transcribe_options(profile)
+                        stop_when = None
+                        if early_stop:
+                            stop_when = functools.partial(self.rules.early_stop_label, call_type=call_type)
+                            # Without timestamps a 30 second window comes back as a single segment,
+                            # so there would be nothing to stop between
+                            options["without_timestamps"] = False
+                        transcribed_text = self._transcribe_serial(
+                            model_name, audio, prompt_tokens, options, stop_when, info
                         )
-                elif call_type == "medicare":
-                    initial_prompt = (
-                        "calling, want, need, what, tricare, minute, hello, yes, no, sure, nah, correct, "
-                        "connect, incorrect, military, both, interested, not interested, retired, "
-                        "medicare, Medicaid, humana, above, over, yes sir, senior alright, part A, card, "
-                        "part B, part C, A, B, C, D, V-A, A and B, and C, ABC and D, AB and C, E, not, "
-                        "entitled, busy, moment, eyes, hearing, dental, advantage, not entitled, right, "
-                        "absolutely, need, mate, united, invited, whole, social security, I don't, I do, "
-                        "call, vision, medication, yeah, guess, cover, I guess, go ahead"
-                    )
-                elif call_type == "aca":
-                    initial_prompt = (
-                        "calling, want, need, what, tricare, minute, hello, yes, no, sure, nah, correct, "
-                        "connect, incorrect, military, both, interested, not interested, retired, insurance, "
-                        "medicare, employment, Medicaid, humana, above, over, yes sir, senior, I am, alright, card, "
-                        "ACA, aetna, humana, united, M-better, less, more, annual, income, not, "
-                        "entitled, busy, moment, eyes, hearing, dental, advantage, not entitled, right, "
-                        "absolutely, need, mate, united, invited, whole, social security, I don't, I do, "
-                        "call, vision, medication, yeah, guess, cover, I guess, go ahead, V-A, employed"
-                    )
-                else:
-                    initial_prompt = None
-
-                logger.info(f"received file {file_path}")
-                with open(file_path, "rb") as f:
-                    segments, _ = self.whisper_model.transcribe(
-                        f,
-                        beam_size=5,
-                        best_of=5,
-                        initial_prompt=initial_prompt,
-                        suppress_tokens=[0, 11, 13, 30],
-                    )
-                    transcribed_text = " ".join([segment.text for segment in segments])
-
-            elif self.whisper_model is not None and not c.TYPE:
-                with open(file_path, "rb") as f:
-                    segments, _ = self.whisper_model.transcribe(
-                        f,
-                        beam_size=5,
-                        best_of=5,
-                        initial_prompt="Glossary: new service, customer support, prices, packages, subscription, "
-                        "phone, cable, internet, help, TV, mobile, bill, router, wires, hello, hi, "
-                        "sign up, signing up, billed, customer, cost, wi-fi, wifi, apartment, xfinity, "
-                        "comcast, AT&T, optimum, spectrum, viacast, verizon, t-mobile, "
-                        "cox communication, address, moving, deals, transfer, house, line, agent, "
-                        "hang up, hung up, dropped, hanged, screen, program, cancelled, pricing, home, "
-                        "restart, area, set up, hooked, old, account, looking, questions, calling, "
-                        "transferred, hook up, different, quote, how much, information, contract, "
-                        "contact, turned off, on, disabled, qualify, the service, move the service, "
-                        "support, Ima, suspend, disconnect, disconnected",
-                        suppress_tokens=[0, 11, 13, 30],
-                    )
-                    transcribed_text = " ".join([segment.text for segment in segments])
 
-            self.active_transcriptions_count -= 1
-            self.active_transcriptions.popleft()
-            return transcribed_text
+            return transcribed_text, info
 
         except Exception as error:
             logger.error(f"Error during transcription: {error}")
-            self.active_transcriptions -= 1
-        raise
+            raise
+        finally:
+            self.active_transcriptions_count -= 1
+            self.active_transcriptions.popleft()
+
+    def _transcribe_serial(self, model_name, audio, prompt_tokens, options, stop_when=None, info=None):
+        segments, _ = self.whisper_models[model_name].transcribe(
+            audio,
+            initial_prompt=prompt_tokens,
+            suppress_tokens=c.SUPPRESS_TOKENS,
+            **options,
+        )
+        if stop_when is None:
+            return " ".join([segment.text for segment in segments])
+
+        texts = []
+        # segments is lazy, leaving the loop early skips decoding the rest of the audio
+        for segment in segments:
+            texts.append(segment.text)
+            label = stop_when(" ".join(texts))
+            if label is not None:
+                if info is not None:
+                    info["early_stop"] = {
+                        "label": label,
+                        "segments": len(texts),
+                        "decoded_seconds": segment.end,
+                        "skipped_seconds": max(0.0, duration_seconds(audio) - segment.end),
+                    }
+                break
+        return " ".join(texts)
+
+    def _transcribe_batch(self, items, model_name, profile_name, profile):
+        """Run one batched encoder pass and a batched decode per distinct prompt for (audio, prompt tokens) items."""
+        BATCH_SIZE.observe(len(items), model=model_name, profile=profile_name)
+        encoder_outputs = self._encode(model_name, [audio for audio, _ in items])
+        prompts = [
+            self._build_prompt(prompt_tokens, profile["without_timestamps"]) for _, prompt_tokens in items
+        ]
+        # generate needs <|startoftranscript|> at the same position in every prompt, so each
+        # distinct prompt is decoded as its own batch after the shared encoder pass
+        groups = collections.defaultdict(list)
+        for index, prompt in enumerate(prompts):
+            groups[tuple(prompt)].append(index)
+        batch_size = len(items)
+        outputs = [None] * len(items)
+        for indices in groups.values():
+            results = self._decode(
+                model_name, [encoder_outputs[index] for index in indices], [prompts[index] for index in indices],
+                profile,
+            )
+            for index, result in zip(indices, results):
+                if len(profile["temperature"]) > 1 and needs_fallback(*result):
+                    # Retry the remaining temperatures on the decoder only
+                    result = self._decode_with_fallback(model_name, encoder_outputs[index], prompts[index], profile,
+                                                        result)
+                outputs[index] = (self._text(result), batch_size)
+        return outputs
+
+    def _features(self, model_name, audio):
+        feature_extractor = self.whisper_models[model_name].feature_extractor
+        return feature_extractor(
+            np.pad(audio, (0, feature_extractor.n_samples - len(audio)))
+        )[:, :feature_extractor.nb_max_frames]
+
+    def _encode(self, model_name, audios):
+        """Encoder output of each single-window clip as its own array, reusing cached ones."""
+        keys = [None] * len(audios)
+        outputs = [None] * len(audios)
+        if c.ENCODER_CACHE:
+            keys = [
+                (model_name, hashlib.blake2b(audio.tobytes(), digest_size=16).hexdigest()) for audio in audios
+            ]
+            outputs = [self.encoder_cache.get(key) for key in keys]
+        missing = [index for index, output in enumerate(outputs) if output is None]
+        if missing:
+            features = np.stack([self._features(model_name, audios[index]) for index in missing])
+            # Brought back to host memory so each clip's slice can be cached and re-batched
+            encoded = np.asarray(self.whisper_models[model_name].model.encode(
+                ctranslate2.StorageView.from_array(np.ascontiguousarray(features)), to_cpu=True
+            ))
+            for row, index in enumerate(missing):
+                # A copy, so a cached clip does not keep the rest of its batch alive
+                outputs[index] = encoded[row].copy()
+                if keys[index] is not None:
+                    self.encoder_cache.set(keys[index], outputs[index])
+        return outputs
+
+    def _decode(self, model_name, encoder_outputs, prompts, profile, temperature=0.0):
+        """Decoder-only pass over encoder outputs, returning (text, tokens, score, no_speech_prob) per clip."""
+        results = self.whisper_models[model_name].model.generate(
+            ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack(encoder_outputs))),
+            prompts,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=True,
+            suppress_tokens=self.suppress_tokens,
+            **generate_options(profile, temperature),
+        )
+        outputs = []
+        for result in results:
+            best = max(range(len(result.sequences_ids)), key=lambda index: result.scores[index])
+            tokens = result.sequences_ids[best]
+            outputs.append((self.tokenizer.decode(tokens), tokens, result.scores[best], result.no_speech_prob))
+        return outputs
+
+    @staticmethod
+    def _text(result):
+        """Text of a decode result, empty when transcribe would have skipped it as silence."""
+        text, tokens, score, no_speech_prob = result
+        return "" if is_no_speech(tokens, score, no_speech_prob) else text
+
+    def _decode_with_fallback(self, model_name, encoder_output, prompt, profile, first_result):
+        attempts = [first_result]
+        for temperature in profile["temperature"][1:]:
+            result = self._decode(model_name, [encoder_output], [prompt], profile, temperature)[0]
+            if not needs_fallback(*result):
+                return result
+            attempts.append(result)
+        # Every temperature failed the checks, keep the most likely one like faster-whisper
+        return max(attempts, key=lambda attempt: attempt[2])
+
+    def compare_prompts(self, audio, variants, model_name=None):
+        """Decode one clip under several (prompt name, decoding profile name) variants, encoding it once.
+
+        A prompt name of None decodes without a prompt. Only single-window clips are supported.
+        """
+        model_name = model_name or self.default_model
+        if model_name not in self.whisper_models:
+            raise ValueError(f"Unknown Whisper model: {model_name}, loaded: {sorted(self.whisper_models)}")
+        audio, durations = self.preprocess(audio)
+        if len(audio) > self.whisper_model.feature_extractor.n_samples:
+            raise ValueError("Prompt comparison supports clips of up to 30 seconds")
+        for prompt_name, profile_name in variants:
+            if prompt_name is not None and prompt_name not in self.prompt_registry.prompts:
+                raise ValueError(f"Unknown prompt: {prompt_name}")
+            if profile_name not in c.DECODING_PROFILES:
+                raise ValueError(f"Unknown decoding profile: {profile_name}")
+
+        start_time = time.perf_counter()
+        [encoder_output] = self._encode(model_name, [audio])
+        encode_seconds = time.perf_counter() - start_time
+        results = []
+        for prompt_name, profile_name in variants:
+            profile = c.DECODING_PROFILES[profile_name]
+            prompt_tokens = self.prompt_registry.prompts[prompt_name].tokens if prompt_name is not None else None
+            prompt = self._build_prompt(prompt_tokens, profile["without_timestamps"])
+            start_time = time.perf_counter()
+            result = self._decode(model_name, [encoder_output], [prompt], profile)[0]
+            if len(profile["temperature"]) > 1 and needs_fallback(*result):
+                result = self._decode_with_fallback(model_name, encoder_output, prompt, profile, result)
+            results.append({
+                "prompt": prompt_name,
+                "decoding_profile": profile_name,
+                "prompt_tokens": len(prompt_tokens or []),
+                "transcription": self._text(result),
+                "score": result[2],
+                "decode_seconds": time.perf_counter() - start_time,
+            })
+        return {**durations, "model": model_name, "encode_seconds": encode_seconds, "variants": results}
+
+    def _build_prompt(self, prompt_tokens, without_timestamps=True):
+        prompt = []
+        if prompt_tokens:
+            prompt.append(self.tokenizer.sot_prev)
+            prompt.extend(prompt_tokens[-(MAX_TEXT_CONTEXT // 2 - 1):])
+        prompt.extend(self.tokenizer.sot_sequence)
+        if without_timestamps:
+            prompt.append(self.tokenizer.no_timestamps)
+        return prompt
 
     async def shutdown(self):
         self.shutdown_in_progress = True
         while self.active_transcriptions_count > 0:
             await asyncio.sleep(0.1)
+        for batcher in self.batchers.values():
+            batcher.stop()
+        self.batchers = {}
+        self.executor.shutdown(wait=False)
         self.whisper_model = None
+        self.whisper_models = {}
         logger.info("Graceful shutdown completed.")
@@ -2,13 +2,14 @@ import asyncio
 import requests
 import time
 
-from fastapi import FastAPI, BackgroundTasks, Request, HTTPException
+from fastapi import FastAPI, BackgroundTasks, Request, HTTPException, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from voiceflow_ai.core.dependencies import get_transcription_service
 from voiceflow_ai.routers import transcription_router
 from voiceflow_ai.core.logger import get_logger
 from voiceflow_ai.core.config import settings as c
+from voiceflow_ai.core.metrics import CONTENT_TYPE, REGISTRY
 
 
 app = FastAPI()
@@ -19,6 +20,52 @@ logger = get_logger("transcription")
 
 test = False
 
+REGISTRY.callback(
+    "voiceflow_transcriptions_active", "Transcriptions currently running", "gauge",
+    lambda: transcription_service.active_transcriptions_count,
+)
+REGISTRY.callback(
+    "voiceflow_inference_queue_waiting", "Requests waiting for an inference slot", "gauge",
+    lambda: transcription_service.admission.waiting,
+)
+REGISTRY.callback(
+    "voiceflow_inference_in_flight", "Requests holding an inference slot", "gauge",
+    lambda: transcription_service.admission.in_flight,
+)
+REGISTRY.callback(
+    "voiceflow_inference_rejected_total", "Requests rejected by admission control", "counter",
+    lambda: transcription_service.admission.rejected,
+)
+REGISTRY.callback(
+    "voiceflow_batch_queue_depth", "Requests queued for a Whisper micro-batch", "gauge",
+    lambda: {key: batcher.queue_depth for key, batcher in transcription_service.batchers.items()},
+    ["model", "profile"],
+)
+REGISTRY.callback(
+    "voiceflow_result_cache_hits_total", "Transcription result cache hits", "counter",
+    lambda: transcription_service.result_cache.hits,
+)
+REGISTRY.callback(
+    "voiceflow_result_cache_misses_total", "Transcription result cache misses", "counter",
+    lambda: transcription_service.result_cache.misses,
+)
+REGISTRY.callback(
+    "voiceflow_result_cache_hit_ratio", "Transcription result cache hit ratio since start", "gauge",
+    lambda: transcription_service.result_cache.stats()["hit_rate"],
+)
+REGISTRY.callback(
+    "voiceflow_encoder_cache_hits_total", "Whisper encoder output cache hits", "counter",
+    lambda: transcription_service.encoder_cache.hits,
+)
+REGISTRY.callback(
+    "voiceflow_encoder_cache_misses_total", "Whisper encoder output cache misses", "counter",
+    lambda: transcription_service.encoder_cache.misses,
+)
+REGISTRY.callback(
+    "voiceflow_result_cache_entries", "Entries in the transcription result cache", "gauge",
+    lambda: len(transcription_service.result_cache),
+)
+
 
 async def startup_event():
     global test
@@ -78,7 +125,7 @@ async def run_test_transcription():
 @app.get("/health")
 async def health_check():
     global test
-    if (transcription_service.whisper_model is not None and test and
+    if (transcription_service.ready and test and
         not transcription_service.shutdown_in_progress and
         (not transcription_service.active_transcriptions or
          time.time() - transcription_service.active_transcriptions[0] <= 8)):
@@ -87,6 +134,11 @@ async def health_check():
         raise HTTPException(status_code=500, detail="Service is unhealthy")
 
 
+@app.get("/metrics")
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.post("/shutdown")
 async def shutdown(background_tasks: BackgroundTasks):
     logger.info("Shutdown signal received")
@@ -111,11 +163,11 @@ async def exception_handler(request: Request, exc: Exception):
 
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
-        if request.url.path != "/health":
+        if request.url.path not in ("/health", "/metrics"):
             logger.debug(f"Processing request: {request.method} {request.url}",
                          extra={"serial_number": request.get("serial_number")})
         response = await call_next(request)
-        if request.url.path != "/health":
+        if request.url.path not in ("/health", "/metrics"):
             logger.debug(f"Request processed: {response.status_code}",
                          extra={"serial_number": request.get("serial_number")})
         return response